@@ -0,0 +1,546 @@
+from __future__ import annotations
+import heapq
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from anysystem import Codec, Context, JsonCodec, Message, Process, SplitMixStream
+try:
+    from anytrace import (DELIVER, DROP, LOCAL_IN, LOCAL_OUT, SEND, TIMER_CANCEL, TIMER_FIRE, TIMER_SET,
+                          TraceWriter)
+except ImportError:
+    # anytrace.py is optional, without it events are simulated but cannot be traced
+    TraceWriter = None
+
+
+# event kinds
+MESSAGE = 0
+TIMER = 1
+
+LatencyModel = Callable[[str, str, random.Random], float]
+
+
+def _payload_size(payload) -> int:
+    return len(payload) if isinstance(payload, (str, bytes)) else 0
+
+
+class Network:
+    """
+    Network model: message latency, drops, duplication and per-node link failures.
+    """
+
+    def __init__(self, rng: random.Random):
+        self._rng = rng
+        self._min_delay = 1.
+        self._max_delay = 1.
+        self._latency_model: Optional[LatencyModel] = None
+        self._drop_rate = 0.
+        self._dupl_rate = 0.
+        self._drop_outgoing = set()
+        self._drop_incoming = set()
+        self._message_count = 0
+        self._dropped_count = 0
+
+    def set_delay(self, delay: float):
+        """
+        Sets a fixed message delay.
+        """
+        self.set_delays(delay, delay)
+
+    def set_delays(self, min_delay: float, max_delay: float):
+        """
+        Sets message delay uniformly distributed in [min_delay, max_delay].
+        """
+        if min_delay < 0 or max_delay < min_delay:
+            raise ValueError('delays have to satisfy 0 <= min_delay <= max_delay')
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._latency_model = None
+
+    def set_latency_model(self, model: LatencyModel):
+        """
+        Sets a function (src_node, dst_node, rng) -> delay used instead of uniform delays.
+        """
+        self._latency_model = model
+
+    def set_drop_rate(self, drop_rate: float):
+        """
+        Sets the probability of losing a message.
+        """
+        if not 0 <= drop_rate <= 1:
+            raise ValueError('drop_rate argument has to be in [0, 1]')
+        self._drop_rate = drop_rate
+
+    def set_dupl_rate(self, dupl_rate: float):
+        """
+        Sets the probability of delivering a message twice.
+        """
+        if not 0 <= dupl_rate <= 1:
+            raise ValueError('dupl_rate argument has to be in [0, 1]')
+        self._dupl_rate = dupl_rate
+
+    def drop_outgoing(self, node: str):
+        self._drop_outgoing.add(node)
+
+    def pass_outgoing(self, node: str):
+        self._drop_outgoing.discard(node)
+
+    def drop_incoming(self, node: str):
+        self._drop_incoming.add(node)
+
+    def pass_incoming(self, node: str):
+        self._drop_incoming.discard(node)
+
+    def network_message_count(self) -> int:
+        """
+        Returns the number of messages sent over the network.
+        """
+        return self._message_count
+
+    def dropped_message_count(self) -> int:
+        """
+        Returns the number of messages lost by the network.
+        """
+        return self._dropped_count
+
+    def _delays(self, src_node: str, dst_node: str) -> List[float]:
+        """
+        Returns delivery delays of a sent message: none if dropped, two if duplicated.
+        """
+        self._message_count += 1
+        rng = self._rng
+        if (src_node in self._drop_outgoing or dst_node in self._drop_incoming
+                or (self._drop_rate and rng.random() < self._drop_rate)):
+            self._dropped_count += 1
+            return []
+        copies = 2 if self._dupl_rate and rng.random() < self._dupl_rate else 1
+        if self._latency_model is not None:
+            return [self._latency_model(src_node, dst_node, rng) for _ in range(copies)]
+        if self._min_delay == self._max_delay:
+            return [self._min_delay] * copies
+        return [rng.uniform(self._min_delay, self._max_delay) for _ in range(copies)]
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel (Varghese & Lauck) holding timer events until they are due.
+
+    Events are tuples starting with the deadline. Scheduling is O(1), a due event is moved
+    to the simulator's heap when the wheel reaches its tick, so events keep exact deadlines.
+    Cancelled timers are left in place and dropped when their slot is reached.
+    """
+    BITS = 8
+    MASK = (1 << BITS) - 1
+    LEVELS = 4
+
+    def __init__(self, tick: float = 0.01, is_alive: Optional[Callable[[tuple], bool]] = None):
+        if tick <= 0:
+            raise ValueError('tick argument has to be positive')
+        self._tick = tick
+        self._is_alive = is_alive
+        self._cursor = 0  # last expired tick
+        self._slots = [[[] for _ in range(self.MASK + 1)] for _ in range(self.LEVELS)]
+        self._overflow = []
+        # number of events on each level, the last one is the overflow list
+        self._counts = [0] * (self.LEVELS + 1)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, event: tuple) -> bool:
+        """
+        Puts the event into the wheel. Returns False if it is already due and was not scheduled.
+        """
+        tick = int(event[0] / self._tick)
+        if tick <= self._cursor:
+            return False
+        self._place(tick, event)
+        self._size += 1
+        return True
+
+    def _place(self, tick: int, event: tuple):
+        # the level is chosen by the highest tick digit differing from the cursor,
+        # so the slot is cascaded to lower levels before the event is due
+        level = ((tick ^ self._cursor).bit_length() - 1) // self.BITS
+        if level <= 0:
+            level = 0
+            self._slots[0][tick & self.MASK].append(event)
+        elif level < self.LEVELS:
+            self._slots[level][(tick >> (self.BITS * level)) & self.MASK].append(event)
+        else:
+            level = self.LEVELS
+            self._overflow.append(event)
+        self._counts[level] += 1
+
+    def advance(self, time: float, due: List[tuple]):
+        """
+        Moves events with ticks up to the given time to the due heap.
+        """
+        self._advance_to(int(time / self._tick), due, False)
+
+    def advance_to_next(self, time: Optional[float], due: List[tuple]):
+        """
+        Moves events of the next non-empty tick (not later than the given time) to the due heap.
+        """
+        limit = int(time / self._tick) if time is not None else None
+        self._advance_to(limit, due, True)
+
+    def _advance_to(self, target: Optional[int], due: List[tuple], stop_on_due: bool):
+        slots = self._slots[0]
+        counts = self._counts
+        mask = self.MASK
+        is_alive = self._is_alive
+        while self._size and (target is None or self._cursor < target):
+            # skip ticks up to the next cascade of the lowest non-empty level
+            level = 0
+            while counts[level] == 0:
+                level += 1
+            if level > 0:
+                skip_to = self._cursor | ((1 << (self.BITS * level)) - 1)
+                if target is not None and skip_to >= target:
+                    self._cursor = target
+                    return
+                self._cursor = skip_to
+            self._cursor += 1
+            cursor = self._cursor
+            if cursor & mask == 0:
+                self._cascade(cursor)
+            slot = slots[cursor & mask]
+            if not slot:
+                continue
+            slots[cursor & mask] = []
+            counts[0] -= len(slot)
+            self._size -= len(slot)
+            moved = False
+            for event in slot:
+                if is_alive is None or is_alive(event):
+                    heapq.heappush(due, event)
+                    moved = True
+            if moved and stop_on_due:
+                return
+        if not self._size and target is not None and self._cursor < target:
+            self._cursor = target
+
+    def _cascade(self, cursor: int):
+        bits = self.BITS
+        mask = self.MASK
+        tick = self._tick
+        is_alive = self._is_alive
+        for level in range(1, self.LEVELS + 1):
+            if level == self.LEVELS:
+                events, self._overflow = self._overflow, []
+            else:
+                index = (cursor >> (bits * level)) & mask
+                events = self._slots[level][index]
+                self._slots[level][index] = []
+            self._counts[level] -= len(events)
+            for event in events:
+                if is_alive is None or is_alive(event):
+                    self._place(int(event[0] / tick), event)
+                else:
+                    self._size -= 1
+            if (cursor >> (bits * level)) & mask:
+                break
+
+
+class _ProcessEntry:
+    __slots__ = ('name', 'proc', 'node', 'rng', 'timers', 'outbox', 'read_count', 'sent_count')
+
+    def __init__(self, name: str, proc: Process, node: str, rng: SplitMixStream):
+        self.name = name
+        self.proc = proc
+        self.node = node
+        self.rng = rng
+        self.timers: Dict[str, int] = {}
+        self.outbox: List[Tuple[str, object]] = []
+        self.read_count = 0
+        self.sent_count = 0
+
+
+class System:
+    """
+    In-process discrete-event simulator running anysystem processes without the AnySystem runtime.
+    Mirrors the interface of the runtime's System.
+
+    With batch_delivery enabled, all messages delivered to a process at the same instant
+    are passed to a single Process.on_messages call, and each step processes a whole instant.
+    """
+
+    def __init__(self, seed: int, codec: Optional[Codec] = None, batch_delivery: bool = False,
+                 timer_tick: float = 0.01):
+        self._time = 0.
+        self._seed = seed
+        self._batch_delivery = batch_delivery
+        self._rng = random.Random(seed)
+        random.seed(seed)
+        self._codec = codec if codec is not None else JsonCodec()
+        self._network = Network(self._rng)
+        self._nodes: Dict[str, List[str]] = {}
+        self._procs: Dict[str, _ProcessEntry] = {}
+        self._events: List[tuple] = []
+        self._timers = TimerWheel(timer_tick, self._timer_alive)
+        self._pending_messages = 0
+        self._live_timers = 0
+        self._seq = 0
+        self._event_count = 0
+        self._tracer: Optional[TraceWriter] = None
+
+    def network(self) -> Network:
+        return self._network
+
+    def add_node(self, name: str):
+        if name in self._nodes:
+            raise ValueError('node {} already exists'.format(name))
+        self._nodes[name] = []
+
+    def add_process(self, name: str, proc: Process, node: str):
+        if node not in self._nodes:
+            raise ValueError('node {} does not exist'.format(node))
+        if name in self._procs:
+            raise ValueError('process {} already exists'.format(name))
+        self._nodes[node].append(name)
+        self._procs[name] = _ProcessEntry(name, proc, node, SplitMixStream('{}:{}'.format(self._seed, name)))
+
+    def process_names(self) -> List[str]:
+        return list(self._procs)
+
+    def process(self, name: str) -> Process:
+        return self._procs[name].proc
+
+    def time(self) -> float:
+        return self._time
+
+    def set_tracer(self, tracer: Optional[TraceWriter]):
+        """
+        Records all subsequent events (sent, delivered and dropped messages, local messages
+        and timer actions) into the trace, None disables tracing.
+        """
+        self._tracer = tracer
+
+    def event_count(self) -> int:
+        """
+        Returns the number of processed events.
+        """
+        return self._event_count
+
+    def pending_event_count(self) -> int:
+        return self._pending_messages + self._live_timers
+
+    def _timer_alive(self, event: tuple) -> bool:
+        return self._procs[event[3]].timers.get(event[4]) == event[5]
+
+    def _pull_timers(self, end_time: Optional[float]):
+        # moves timers that may fire before the next message from the wheel to the heap
+        if self._events:
+            self._timers.advance(self._events[0][0], self._events)
+        else:
+            self._timers.advance_to_next(end_time, self._events)
+
+    def send_local_message(self, proc: str, msg: Message):
+        """
+        Delivers a local message to the process immediately.
+        """
+        entry = self._procs[proc]
+        if self._tracer is not None:
+            self._tracer.record(self._time, LOCAL_IN, proc, proc, msg.type)
+        ctx = Context(self._time, self._codec, entry.rng)
+        entry.proc.on_local_message(msg, ctx)
+        self._handle_actions(entry, ctx)
+
+    def local_outbox(self, proc: str) -> List[Message]:
+        """
+        Returns all local messages sent by the process.
+        """
+        codec = self._codec
+        return [Message.decode(msg_type, payload, codec) for msg_type, payload in self._procs[proc].outbox]
+
+    def local_message_count(self, proc: str) -> int:
+        """
+        Returns the number of local messages sent by the process.
+        """
+        return len(self._procs[proc].outbox)
+
+    def read_local_messages(self, proc: str) -> List[Message]:
+        """
+        Returns local messages sent by the process since the previous call.
+        """
+        entry = self._procs[proc]
+        codec = self._codec
+        messages = [Message.decode(msg_type, payload, codec) for msg_type, payload in entry.outbox[entry.read_count:]]
+        entry.read_count = len(entry.outbox)
+        return messages
+
+    def sent_message_count(self, proc: str) -> int:
+        return self._procs[proc].sent_count
+
+    def step(self) -> bool:
+        """
+        Processes the next event. Returns False if there are no events left.
+        """
+        return self._run(None, 1) > 0
+
+    def steps(self, count: int) -> bool:
+        self._run(None, count)
+        return self.pending_event_count() > 0
+
+    def step_for_duration(self, duration: float) -> bool:
+        """
+        Processes events during the specified time. Returns False if there are no events left.
+        """
+        end_time = self._time + duration
+        self._run(end_time, None)
+        self._time = end_time
+        return self.pending_event_count() > 0
+
+    def step_until_no_events(self):
+        self._run(None, None)
+
+    def _run(self, end_time: Optional[float], max_steps: Optional[int]) -> int:
+        if self._batch_delivery:
+            return self._run_batched(end_time, max_steps)
+        events = self._events
+        timers = self._timers
+        tick = timers._tick
+        procs = self._procs
+        codec = self._codec
+        handle_actions = self._handle_actions
+        heappop = heapq.heappop
+        trace = self._tracer.record if self._tracer is not None else None
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            if timers._size and (not events or int(events[0][0] / tick) > timers._cursor):
+                self._pull_timers(end_time)
+            if not events or (end_time is not None and events[0][0] > end_time):
+                break
+            event_time, _, kind, dst, arg1, arg2, arg3 = heappop(events)
+            self._time = event_time
+            entry = procs[dst]
+            if kind == MESSAGE:
+                self._pending_messages -= 1
+                if trace is not None:
+                    trace(event_time, DELIVER, arg3, dst, arg1, _payload_size(arg2))
+                ctx = Context(event_time, codec, entry.rng)
+                entry.proc.on_message(Message.decode(arg1, arg2, codec), arg3, ctx)
+            elif entry.timers.get(arg1) == arg2:
+                del entry.timers[arg1]
+                self._live_timers -= 1
+                if trace is not None:
+                    trace(event_time, TIMER_FIRE, dst, dst, arg1)
+                ctx = Context(event_time, codec, entry.rng)
+                entry.proc.on_timer(arg1, ctx)
+            else:
+                # timer was cancelled or overridden
+                continue
+            handle_actions(entry, ctx)
+            steps += 1
+        self._event_count += steps
+        return steps
+
+    def _run_batched(self, end_time: Optional[float], max_steps: Optional[int]) -> int:
+        events = self._events
+        timers = self._timers
+        tick = timers._tick
+        procs = self._procs
+        codec = self._codec
+        handle_actions = self._handle_actions
+        heappop = heapq.heappop
+        trace = self._tracer.record if self._tracer is not None else None
+        steps = 0
+        event_count = 0
+        while max_steps is None or steps < max_steps:
+            if timers._size and (not events or int(events[0][0] / tick) > timers._cursor):
+                self._pull_timers(end_time)
+            if not events or (end_time is not None and events[0][0] > end_time):
+                break
+            now = events[0][0]
+            self._time = now
+            instant = []
+            while events and events[0][0] == now:
+                instant.append(heappop(events))
+            batches: Dict[str, list] = {}
+            for event in instant:
+                if event[2] == MESSAGE:
+                    batch = batches.get(event[3])
+                    if batch is None:
+                        batches[event[3]] = [event]
+                    else:
+                        batch.append(event)
+            for _, _, kind, dst, arg1, arg2, arg3 in instant:
+                entry = procs[dst]
+                if kind == MESSAGE:
+                    batch = batches.pop(dst, None)
+                    if batch is None:
+                        # already delivered with the first message of the batch
+                        continue
+                    self._pending_messages -= len(batch)
+                    if trace is not None:
+                        for e in batch:
+                            trace(now, DELIVER, e[6], dst, e[4], _payload_size(e[5]))
+                    ctx = Context(now, codec, entry.rng)
+                    if len(batch) == 1:
+                        entry.proc.on_message(Message.decode(arg1, arg2, codec), arg3, ctx)
+                    else:
+                        entry.proc.on_messages([(Message.decode(e[4], e[5], codec), e[6]) for e in batch], ctx)
+                    event_count += len(batch)
+                elif entry.timers.get(arg1) == arg2:
+                    del entry.timers[arg1]
+                    self._live_timers -= 1
+                    if trace is not None:
+                        trace(now, TIMER_FIRE, dst, dst, arg1)
+                    ctx = Context(now, codec, entry.rng)
+                    entry.proc.on_timer(arg1, ctx)
+                    event_count += 1
+                else:
+                    continue
+                handle_actions(entry, ctx)
+            steps += 1
+        self._event_count += event_count
+        return steps
+
+    def _handle_actions(self, entry: _ProcessEntry, ctx: Context):
+        events = self._events
+        now = self._time
+        if self._tracer is not None:
+            self._trace_actions(entry, ctx)
+        if ctx._sent_messages:
+            procs = self._procs
+            delays = self._network._delays
+            entry.sent_count += len(ctx._sent_messages)
+            for msg_type, payload, to in ctx._sent_messages:
+                dst = procs.get(to)
+                if dst is None:
+                    raise ValueError('process {} does not exist'.format(to))
+                copies = delays(entry.node, dst.node)
+                if not copies and self._tracer is not None:
+                    self._tracer.record(now, DROP, entry.name, to, msg_type, _payload_size(payload))
+                for delay in copies:
+                    self._seq += 1
+                    self._pending_messages += 1
+                    heapq.heappush(events, (now + delay, self._seq, MESSAGE, to, msg_type, payload, entry.name))
+        if ctx._sent_local_messages:
+            entry.outbox.extend(ctx._sent_local_messages)
+        if ctx._timer_actions:
+            timers = entry.timers
+            for timer_name, delay, once in ctx._timer_actions:
+                if delay < 0:
+                    if timers.pop(timer_name, None) is not None:
+                        self._live_timers -= 1
+                elif not once or timer_name not in timers:
+                    if timer_name not in timers:
+                        self._live_timers += 1
+                    self._seq += 1
+                    timers[timer_name] = self._seq
+                    event = (now + delay, self._seq, TIMER, entry.name, timer_name, self._seq, None)
+                    if not self._timers.schedule(event):
+                        heapq.heappush(events, event)
+
+    def _trace_actions(self, entry: _ProcessEntry, ctx: Context):
+        trace = self._tracer.record
+        now = self._time
+        name = entry.name
+        for msg_type, payload, to in ctx._sent_messages:
+            trace(now, SEND, name, to, msg_type, _payload_size(payload))
+        for msg_type, payload in ctx._sent_local_messages:
+            trace(now, LOCAL_OUT, name, name, msg_type, _payload_size(payload))
+        for timer_name, delay, _ in ctx._timer_actions:
+            trace(now, TIMER_CANCEL if delay < 0 else TIMER_SET, name, name, timer_name)
@@ -0,0 +1,116 @@
+import argparse
+import importlib
+import statistics
+
+from anysim import System
+from anysystem import Message
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def build_system(impl, drop_rate: float, args, *client_args) -> System:
+    sys = System(args.seed)
+    sys.network().set_delays(args.min_delay, args.max_delay)
+    sys.network().set_drop_rate(drop_rate)
+    sys.add_node('server-node')
+    sys.add_node('client-node')
+    sys.add_process('server', impl.PingServer('server'), 'server-node')
+    sys.add_process('client', impl.PingClient('client', 'server', *client_args), 'client-node')
+    return sys
+
+
+def run_sequential(impl, drop_rate: float, args) -> dict:
+    """
+    Sends pings one after another and returns their latencies.
+    """
+    sys = build_system(impl, drop_rate, args)
+    latencies = []
+    for i in range(args.pings):
+        started = sys.time()
+        sys.send_local_message('client', Message('PING', {'value': 'Hello{}!'.format(i)}))
+        while sys.local_message_count('client') == i:
+            if not sys.step():
+                raise RuntimeError('ping {} was not answered'.format(i))
+        latencies.append(sys.time() - started)
+    return {
+        'latencies': latencies,
+        'messages': sys.network().network_message_count(),
+    }
+
+
+def run_windowed(impl, drop_rate: float, window: int, args) -> dict:
+    """
+    Sends all pings at once to a client with the given window, returns the time to get all PONGs.
+    """
+    sys = build_system(impl, drop_rate, args, window)
+    for i in range(args.pings):
+        sys.send_local_message('client', Message('PING', {'value': 'Hello{}!'.format(i)}))
+    sys.step_until_no_events()
+    if sys.local_message_count('client') != args.pings:
+        raise RuntimeError('not all pings were answered')
+    replies = getattr(sys.process('server'), '_replies', None)
+    return {
+        'time': sys.time(),
+        'messages': sys.network().network_message_count(),
+        'cached_replies': replies.hits if replies is not None else None,
+        'cache_size': len(replies) if replies is not None else None,
+    }
+
+
+def bench_latency(args):
+    print(f'Pings: {args.pings}, network delay: [{args.min_delay}, {args.max_delay}]')
+    print(f'{"impl":<16} {"drop":>5} {"mean":>8} {"p50":>8} {"p90":>8} {"p99":>8} {"max":>8} {"msgs/ping":>10}')
+    for name in args.impl:
+        impl = importlib.import_module(name)
+        for drop_rate in args.drop_rates:
+            result = run_sequential(impl, drop_rate, args)
+            latencies = result['latencies']
+            print(f'{name:<16} {drop_rate:>5} {statistics.fmean(latencies):>8.3f} '
+                  f'{percentile(latencies, 0.5):>8.3f} {percentile(latencies, 0.9):>8.3f} '
+                  f'{percentile(latencies, 0.99):>8.3f} {max(latencies):>8.3f} '
+                  f'{result["messages"] / args.pings:>10.2f}')
+
+
+def bench_throughput(args):
+    impl = importlib.import_module(args.impl)
+    print(f'Pings: {args.pings}, network delay: [{args.min_delay}, {args.max_delay}]')
+    print(f'{"window":>6} {"drop":>5} {"pings/s":>10} {"msgs/ping":>10} {"cached":>8} {"cache size":>10}')
+    for window in args.windows:
+        for drop_rate in args.drop_rates:
+            result = run_windowed(impl, drop_rate, window, args)
+            print(f'{window:>6} {drop_rate:>5} {args.pings / result["time"]:>10.1f} '
+                  f'{result["messages"] / args.pings:>10.2f} {result["cached_replies"]!s:>8} '
+                  f'{result["cache_size"]!s:>10}')
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-d', '--drop-rates', type=float, nargs='+', default=[0, 0.1, 0.3])
+    common.add_argument('-n', '--pings', type=int, default=10000)
+    common.add_argument('--min-delay', type=float, default=0.05)
+    common.add_argument('--max-delay', type=float, default=0.15)
+    common.add_argument('-s', '--seed', type=int, default=123)
+
+    parser = argparse.ArgumentParser(description='Ping-pong benchmarks under message loss in the Python simulator.')
+    subparsers = parser.add_subparsers(dest='bench', required=True)
+
+    latency_parser = subparsers.add_parser('latency', parents=[common], help='latency of sequential pings')
+    latency_parser.add_argument('-i', '--impl', nargs='+', default=['impl_retry', 'impl_adaptive'],
+                                help='modules with PingClient and PingServer')
+    latency_parser.set_defaults(func=bench_latency)
+
+    throughput_parser = subparsers.add_parser('throughput', parents=[common], help='throughput of pipelined pings (simulated time)')
+    throughput_parser.add_argument('-i', '--impl', default='impl_window',
+                                   help='module with PingClient taking window size and PingServer')
+    throughput_parser.add_argument('-w', '--windows', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    throughput_parser.set_defaults(func=bench_throughput)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+from anysystem import Context, Message, Process
+from reliable import ReliableRequests, ReplyCache
+
+
+class PingClient(Process):
+    def __init__(self, proc_id: str, server_id: str, window: int = 8):
+        self._id = proc_id
+        self._server_id = server_id
+        # up to window pings are sent without waiting for PONGs,
+        # lost ones are retransmitted by a single timer
+        self._requests = ReliableRequests('check_pong', backoff=1.5, max_rto=5., window=window)
+
+    def on_local_message(self, msg: Message, ctx: Context):
+        # process messages from the local user
+        if msg.type == 'PING':
+            self._requests.send('PING', msg.data, self._server_id, ctx)
+
+    def on_message(self, msg: Message, sender: str, ctx: Context):
+        # process messages from the server, PONGs may arrive in any order
+        if msg.type == 'PONG' and self._requests.complete(msg['id'], ctx) is not None:
+            ctx.send_local(Message('PONG', {'value': msg['value']}))
+
+    def on_timer(self, timer_name: str, ctx: Context):
+        # process fired timers
+        self._requests.on_timer(timer_name, ctx)
+
+
+class PingServer(Process):
+    def __init__(self, proc_id: str):
+        self._id = proc_id
+        # PONGs sent recently, to answer retransmitted PINGs without handling them again
+        self._replies = ReplyCache()
+
+    def on_local_message(self, msg: Message, ctx: Context):
+        # process messages from the local user (not used in this example)
+        pass
+
+    def on_message(self, msg: Message, sender: str, ctx: Context):
+        # process messages from the client, request id is copied to match the reply
+        if msg.type == 'PING' and not self._replies.replay(sender, msg['id'], ctx):
+            pong = Message('PONG', {'value': msg['value'], 'id': msg['id']})
+            self._replies.reply(sender, msg['id'], pong, ctx)
+
+    def on_timer(self, timer_name: str, ctx: Context):
+        # process fired timers
+        pass
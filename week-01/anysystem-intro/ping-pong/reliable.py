@@ -0,0 +1,240 @@
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+from anysystem import Context, Message
+
+
+class RttEstimator:
+    """
+    Round-trip time estimator by Jacobson and Karels (RFC 6298):
+    smoothed RTT and its mean deviation give the retransmission timeout.
+    """
+
+    def __init__(self, initial_rto: float = 1., min_rto: float = 0.2, max_rto: float = 60.,
+                 alpha: float = 1 / 8, beta: float = 1 / 4, k: float = 4):
+        if not 0 < min_rto <= initial_rto <= max_rto:
+            raise ValueError('timeouts have to satisfy 0 < min_rto <= initial_rto <= max_rto')
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.rto = initial_rto
+        self._min_rto = min_rto
+        self._max_rto = max_rto
+        self._alpha = alpha
+        self._beta = beta
+        self._k = k
+
+    def update(self, rtt: float):
+        """
+        Accounts a measured round-trip time.
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self._beta) * self.rttvar + self._beta * abs(self.srtt - rtt)
+            self.srtt = (1 - self._alpha) * self.srtt + self._alpha * rtt
+        self.rto = min(max(self.srtt + self._k * self.rttvar, self._min_rto), self._max_rto)
+
+    def timeout(self, attempt: int, backoff: float = 2.) -> float:
+        """
+        Returns the timeout of the given (zero-based) attempt with exponential backoff.
+        """
+        return min(self.rto * backoff ** attempt, self._max_rto)
+
+
+class _Request:
+    __slots__ = ('msg', 'to', 'sent_at', 'attempt', 'deadline')
+
+    def __init__(self, msg: Message, to: str, sent_at: float):
+        self.msg = msg
+        self.to = to
+        self.sent_at = sent_at
+        self.attempt = 0
+        self.deadline = 0.
+
+
+class ReliableRequests:
+    """
+    Retransmits requests until they are answered. Many requests may be outstanding at once,
+    each one carries its sequence number in the 'id' field, which the receiver has to copy into the reply.
+
+    Timeouts adapt to the measured RTT, grow exponentially with each retransmission and are randomized
+    by +-jitter to avoid synchronized retries. Following Karn's algorithm, RTT is measured only
+    on requests answered without retransmission. All requests share a single timer set to the earliest
+    deadline, which retransmits only the requests that timed out.
+
+    With a window, at most window requests are outstanding, the following ones are queued
+    and sent as earlier ones complete.
+    The owning process has to pass replies to complete() and timers to on_timer().
+    Requests not answered after max_attempts sends are dropped.
+    """
+
+    def __init__(self, timer_name: str = 'retry', backoff: float = 2., jitter: float = 0.1,
+                 max_attempts: Optional[int] = None, window: Optional[int] = None, **rtt_options):
+        if window is not None and window < 1:
+            raise ValueError('window has to be positive')
+        self._timer_name = timer_name
+        self._timer_deadline: Optional[float] = None
+        self._backoff = backoff
+        self._jitter = jitter
+        self._max_attempts = max_attempts
+        self._window = window
+        self._next_id = 0
+        self._pending: Dict[int, _Request] = {}
+        self._queue: Deque[Tuple[int, Message, str]] = deque()
+        self.rtt = RttEstimator(**rtt_options)
+        self.retransmissions = 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of outstanding and queued requests.
+        """
+        return len(self._pending) + len(self._queue)
+
+    def send(self, msg_type: str, data: Dict[str, Any], to: str, ctx: Context) -> int:
+        """
+        Sends a request (or queues it if the window is full) and returns its id.
+        """
+        self._next_id += 1
+        req_id = self._next_id
+        data = dict(data)
+        data['id'] = req_id
+        msg = Message(msg_type, data)
+        if self._window is not None and len(self._pending) >= self._window:
+            self._queue.append((req_id, msg, to))
+        else:
+            self._start(req_id, msg, to, ctx)
+        return req_id
+
+    def _start(self, req_id: int, msg: Message, to: str, ctx: Context):
+        request = self._pending[req_id] = _Request(msg, to, ctx.time())
+        ctx.send(msg, to)
+        self._schedule(request, ctx)
+
+    def complete(self, req_id: int, ctx: Context) -> Optional[Message]:
+        """
+        Marks the request as answered. Returns the request, or None if it is unknown
+        or already completed (e.g. the reply is a duplicate).
+        The shared timer is not moved to a later deadline, it is re-armed when it fires.
+        """
+        request = self._pending.pop(req_id, None)
+        if request is None:
+            return None
+        if request.attempt == 0:
+            self.rtt.update(ctx.time() - request.sent_at)
+        self._fill_window(ctx)
+        if not self._pending:
+            ctx.cancel_timer(self._timer_name)
+            self._timer_deadline = None
+        return request.msg
+
+    def on_timer(self, timer_name: str, ctx: Context) -> bool:
+        """
+        Retransmits the timed out requests. Returns False if the timer does not belong to the helper.
+        """
+        if timer_name != self._timer_name:
+            return False
+        self._timer_deadline = None
+        now = ctx.time()
+        for req_id, request in list(self._pending.items()):
+            # timer delays are relative, so the deadline may be computed with a rounding error
+            if request.deadline > now + 1e-9:
+                self._schedule_timer(request.deadline, ctx)
+                continue
+            request.attempt += 1
+            if self._max_attempts is not None and request.attempt >= self._max_attempts:
+                del self._pending[req_id]
+                continue
+            self.retransmissions += 1
+            ctx.send(request.msg, request.to)
+            self._schedule(request, ctx)
+        self._fill_window(ctx)
+        return True
+
+    def _fill_window(self, ctx: Context):
+        while self._queue and len(self._pending) < self._window:
+            self._start(*self._queue.popleft(), ctx)
+
+    def _schedule(self, request: _Request, ctx: Context):
+        timeout = self.rtt.timeout(request.attempt, self._backoff)
+        if self._jitter:
+            timeout *= 1 + ctx.rng.uniform(-self._jitter, self._jitter)
+        request.deadline = ctx.time() + timeout
+        self._schedule_timer(request.deadline, ctx)
+
+    def _schedule_timer(self, deadline: float, ctx: Context):
+        if self._timer_deadline is None or deadline < self._timer_deadline:
+            self._timer_deadline = deadline
+            ctx.set_timer(self._timer_name, deadline - ctx.time())
+
+
+class ReplyCache:
+    """
+    Server-side duplicate suppression: remembers replies by (sender, request id),
+    so a retransmitted request is answered with the same replies without handling it again.
+
+    At most capacity entries are kept, evicting the least recently used ones,
+    and entries older than ttl are discarded.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl: float = 60.):
+        if capacity < 1:
+            raise ValueError('capacity has to be positive')
+        if ttl <= 0:
+            raise ValueError('ttl has to be positive')
+        self._capacity = capacity
+        self._ttl = ttl
+        # (sender, request id) -> (time of the first reply, replies)
+        self._entries: OrderedDict[Tuple[str, Hashable], Tuple[float, List[Message]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def replay(self, sender: str, req_id: Hashable, ctx: Context) -> bool:
+        """
+        Resends the cached replies to a duplicate request. Returns False if the request is new.
+        """
+        key = (sender, req_id)
+        entry = self._entries.get(key)
+        if entry is not None and ctx.time() - entry[0] > self._ttl:
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return False
+        self.hits += 1
+        self._entries.move_to_end(key)
+        for msg in entry[1]:
+            ctx.send(msg, sender)
+        return True
+
+    def reply(self, sender: str, req_id: Hashable, msg: Message, ctx: Context):
+        """
+        Sends a reply to the request and remembers it, a request may have several replies.
+        """
+        ctx.send(msg, sender)
+        key = (sender, req_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[1].append(msg)
+            return
+        self._entries[key] = (ctx.time(), [msg])
+        now = ctx.time()
+        while self._entries:
+            oldest_key, (replied_at, _) = next(iter(self._entries.items()))
+            if len(self._entries) > self._capacity:
+                self.evictions += 1
+            elif now - replied_at > self._ttl:
+                self.expirations += 1
+            else:
+                break
+            del self._entries[oldest_key]
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
@@ -0,0 +1,34 @@
+import math
+
+from anysystem import Context, Message, get_codec
+
+
+def sent_payloads(*payloads):
+    ctx = Context(0, get_codec('json'))
+    for data in payloads:
+        ctx.send(Message('VALUE', data), 'peer')
+    return [payload for _, payload, _ in ctx._sent_messages]
+
+
+def test_equal_payload_is_reused():
+    first, second = sent_payloads({'v': 1, 's': 'a'}, {'v': 1, 's': 'a'})
+    assert first is second
+
+
+def test_equal_values_of_other_type_are_encoded():
+    payloads = sent_payloads({'v': 1}, {'v': True}, {'v': 1.0})
+    assert [get_codec('json').decode(payload)['v'] for payload in payloads] == [1, True, 1.0]
+    assert [type(get_codec('json').decode(payload)['v']) for payload in payloads] == [int, bool, float]
+
+
+def test_signed_zero_is_encoded():
+    codec = get_codec('json')
+    positive, negative = sent_payloads({'v': 0.0}, {'v': -0.0})
+    assert math.copysign(1, codec.decode(positive)['v']) == 1
+    assert math.copysign(1, codec.decode(negative)['v']) == -1
+
+
+def test_nan_is_encoded():
+    codec = get_codec('json')
+    payloads = sent_payloads({'v': math.nan}, {'v': math.nan})
+    assert all(math.isnan(codec.decode(payload)['v']) for payload in payloads)
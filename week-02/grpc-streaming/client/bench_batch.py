@@ -0,0 +1,70 @@
+import argparse
+import grpc
+import os
+import time
+
+import queue_pb2
+import queue_pb2_grpc
+
+
+def make_values(start, count):
+    return [queue_pb2.Value(payload=i) for i in range(start, start + count)]
+
+
+def run_unary(stub, count, batch):
+    for value in make_values(0, count):
+        stub.Push(queue_pb2.PushRequest(value=value))
+    return sum(stub.Pop(queue_pb2.PopRequest()).HasField('value') for _ in range(count))
+
+
+def run_stream(stub, count, batch):
+    stub.PushMany(queue_pb2.PushRequest(value=value) for value in make_values(0, count))
+    return sum(1 for _ in stub.Drain(queue_pb2.DrainRequest()))
+
+
+def run_batch(stub, count, batch):
+    for start in range(0, count, batch):
+        stub.PushBatch(queue_pb2.PushBatchRequest(values=make_values(start, min(batch, count - start))))
+    popped = 0
+    while popped < count:
+        response = stub.PopBatch(queue_pb2.PopBatchRequest(max_items=batch))
+        if not response.values:
+            break
+        popped += len(response.values)
+    return popped
+
+
+def run_exchange(stub, count, batch):
+    # every request pushes a batch and pops as many values back
+    requests = (queue_pb2.BatchRequest(values=make_values(start, min(batch, count - start)), max_items=batch)
+                for start in range(0, count, batch))
+    return sum(len(response.values) for response in stub.ExchangeBatches(requests))
+
+
+METHODS = {
+    'unary': run_unary,
+    'stream': run_stream,
+    'batch': run_batch,
+    'exchange': run_exchange,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Values/s of per-item and batched Queue RPCs.')
+    parser.add_argument('-a', '--server-addr', default=os.getenv('SERVER_ADDR', 'localhost:51000'))
+    parser.add_argument('-n', '--values', type=int, default=20000)
+    parser.add_argument('-b', '--batch-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('-m', '--methods', nargs='+', default=list(METHODS), choices=list(METHODS))
+    args = parser.parse_args()
+
+    print(f'{args.values} values pushed and popped by one client, values/s')
+    print(f'{"method":<10} {"batch":>6} {"values/s":>10} {"popped":>8}')
+    with grpc.insecure_channel(args.server_addr) as channel:
+        stub = queue_pb2_grpc.QueueStub(channel)
+        for method in args.methods:
+            # per-item methods do not depend on the batch size
+            for batch in args.batch_sizes if method in ('batch', 'exchange') else [1]:
+                start = time.perf_counter()
+                popped = METHODS[method](stub, args.values, batch)
+                elapsed = time.perf_counter() - start
+                print(f'{method:<10} {batch:>6} {args.values / elapsed:>10,.0f} {popped:>8}')
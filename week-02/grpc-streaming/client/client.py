@@ -5,6 +5,8 @@ import time
 import queue_pb2
 import queue_pb2_grpc
 
+from google.protobuf.duration_pb2 import Duration
+
 
 def request_generator():
     for i in range(5):
@@ -22,3 +24,18 @@ if __name__ == '__main__':
         stub.PushMany(request_generator())
         for response in stub.Drain(queue_pb2.DrainRequest()):
             print(f'Drain returned payload={response.value.payload}, updated_at={response.value.updated_at.ToDatetime()}')
+        response = stub.Pop(queue_pb2.PopRequest(wait=Duration(seconds=1)))
+        print(f'Pop with wait on the empty queue returned value={response.HasField("value")} after a second')
+        subscription = stub.Subscribe(queue_pb2.SubscribeRequest())
+        stub.PushMany(request_generator())
+        for _, response in zip(range(5), subscription):
+            print(f'Subscribe returned payload={response.value.payload}, updated_at={response.value.updated_at.ToDatetime()}')
+        subscription.cancel()
+        stub.PushMany(request_generator())
+        # take the first chunk and disconnect, then resume the drain from its cursor
+        chunks = stub.DrainChunks(queue_pb2.DrainRequest(chunk_size=2))
+        chunk = next(chunks)
+        chunks.cancel()
+        print(f'DrainChunks returned payloads={[value.payload for value in chunk.values]} before the disconnect')
+        for chunk in stub.DrainChunks(queue_pb2.DrainRequest(cursor=chunk.cursor)):
+            print(f'DrainChunks resumed with payloads={[value.payload for value in chunk.values]}')
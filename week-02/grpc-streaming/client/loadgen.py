@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import grpc
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from concurrent import futures
+
+import queue_pb2
+import queue_pb2_grpc
+
+
+def run_client(server_addr, threads, duration, pops_per_push):
+    # each client process has its own channel (and connection), threads share it
+    with grpc.insecure_channel(server_addr) as channel:
+        stub = queue_pb2_grpc.QueueStub(channel)
+        deadline = time.monotonic() + duration
+
+        def worker(thread_id):
+            pushes = pops = hits = 0
+            payload = thread_id << 32
+            while time.monotonic() < deadline:
+                stub.Push(queue_pb2.PushRequest(value=queue_pb2.Value(payload=payload + pushes)))
+                pushes += 1
+                for _ in range(pops_per_push):
+                    response = stub.Pop(queue_pb2.PopRequest())
+                    pops += 1
+                    hits += response.HasField('value')
+            return pushes, pops, hits
+
+        with futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(worker, range(threads)))
+    return tuple(sum(values) for values in zip(*results))
+
+
+def run_load(args):
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.starmap(run_client, [(args.server_addr, args.threads, args.duration, args.pops_per_push)] * args.processes)
+    pushes, pops, hits = (sum(values) for values in zip(*results))
+    return pushes / args.duration, pops / args.duration, hits / max(pops, 1)
+
+
+async def run_streams(args):
+    # many concurrent PushMany streams, each one sends a value per second and stays open for the duration.
+    # Requests are buffered by HTTP/2 flow control, so streams complete even when the server handles them
+    # one by one, the delay shows up as the lag between sending a value and the server stamping it.
+    async with grpc.aio.insecure_channel(args.server_addr) as channel:
+        stub = queue_pb2_grpc.QueueStub(channel)
+
+        async def requests():
+            for _ in range(max(int(args.duration), 1)):
+                # the payload is the send time in microseconds
+                yield queue_pb2.PushRequest(value=queue_pb2.Value(payload=time.time_ns() // 1000))
+                await asyncio.sleep(1)
+
+        async def stream():
+            try:
+                await stub.PushMany(requests())
+                return True
+            except grpc.aio.AioRpcError:
+                return False
+
+        completed = sum(await asyncio.gather(*(stream() for _ in range(args.streams))))
+        lags = [(response.value.updated_at.ToMicroseconds() - response.value.payload) / 1e6
+                async for response in stub.Drain(queue_pb2.DrainRequest())]
+        return completed, statistics.median(lags), max(lags)
+
+
+def start_server(args, max_workers):
+    env = dict(os.environ, SERVER_ADDR=args.server_addr, MAX_WORKERS=str(max_workers),
+               QUEUE_ORDERING=args.ordering, QUEUE_SHARDS=str(args.shards), SERVER_MODE=args.mode)
+    server_dir = os.path.dirname(os.path.abspath(args.server))
+    server = subprocess.Popen([sys.executable, os.path.basename(args.server)], cwd=server_dir, env=env)
+    with grpc.insecure_channel(args.server_addr) as channel:
+        grpc.channel_ready_future(channel).result(timeout=10)
+    return server
+
+
+def run_with_server(args, max_workers, run):
+    # max_workers is None when the load goes to an already running server
+    server = start_server(args, max_workers) if max_workers is not None else None
+    try:
+        return run()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Push/Pop load generator for the Queue service.')
+    parser.add_argument('-a', '--server-addr', default=os.getenv('SERVER_ADDR', 'localhost:51000'))
+    parser.add_argument('-p', '--processes', type=int, default=4, help='client processes')
+    parser.add_argument('-t', '--threads', type=int, default=8, help='concurrent calls per client process')
+    parser.add_argument('-d', '--duration', type=float, default=5)
+    parser.add_argument('--pops-per-push', type=int, default=1)
+    parser.add_argument('-w', '--workers', type=int, nargs='+',
+                        help='start the server with each of these max_workers in turn instead of using a running one')
+    parser.add_argument('--server', default='../server/server.py', help='server script started with --workers')
+    parser.add_argument('-o', '--ordering', default='fifo', help='queue ordering of the started server')
+    parser.add_argument('-s', '--shards', type=int, default=8, help='queue shards of the started server')
+    parser.add_argument('-m', '--mode', default='threads', help='mode of the started server: threads or aio')
+    parser.add_argument('--streams', type=int, help='hold this many concurrent PushMany streams instead')
+    args = parser.parse_args()
+
+    if args.streams:
+        print(f'{args.streams} concurrent PushMany streams for {args.duration}s')
+        print(f'{"workers":>8} {"completed":>10} {"lag p50":>9} {"lag max":>9}')
+        for max_workers in args.workers or [None]:
+            completed, median_lag, max_lag = run_with_server(args, max_workers, lambda: asyncio.run(run_streams(args)))
+            print(f'{max_workers or "-":>8} {completed:>10} {median_lag:>8.3f}s {max_lag:>8.3f}s')
+    else:
+        print(f'{args.processes} client processes x {args.threads} threads, {args.duration}s per run')
+        print(f'{"workers":>8} {"push/s":>10} {"pop/s":>10} {"pop hits":>9}')
+        for max_workers in args.workers or [None]:
+            push_rate, pop_rate, hit_rate = run_with_server(args, max_workers, lambda: run_load(args))
+            print(f'{max_workers or "-":>8} {push_rate:>10,.0f} {pop_rate:>10,.0f} {hit_rate:>9.2%}')
@@ -1,39 +1,62 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
 # source: queue.proto
+# Protobuf Python Version: 5.27.2
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
 from google.protobuf import symbol_database as _symbol_database
 from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    5,
+    27,
+    2,
+    '',
+    'queue.proto'
+)
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
 
 
+from google.protobuf import duration_pb2 as google_dot_protobuf_dot_duration__pb2
 from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bqueue.proto\x12\x05queue\x1a\x1fgoogle/protobuf/timestamp.proto\"\\\n\x05Value\x12\x0f\n\x07payload\x18\x01 \x01(\x04\x12\x33\n\nupdated_at\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.TimestampH\x00\x88\x01\x01\x42\r\n\x0b_updated_at\"*\n\x0bPushRequest\x12\x1b\n\x05value\x18\x01 \x01(\x0b\x32\x0c.queue.Value\"\x0e\n\x0cPushResponse\"\x0c\n\nPopRequest\"9\n\x0bPopResponse\x12 \n\x05value\x18\x01 \x01(\x0b\x32\x0c.queue.ValueH\x00\x88\x01\x01\x42\x08\n\x06_value\"\x0e\n\x0c\x44rainRequest2\xd1\x01\n\x05Queue\x12/\n\x04Push\x12\x12.queue.PushRequest\x1a\x13.queue.PushResponse\x12\x35\n\x08PushMany\x12\x12.queue.PushRequest\x1a\x13.queue.PushResponse(\x01\x12,\n\x03Pop\x12\x11.queue.PopRequest\x1a\x12.queue.PopResponse\x12\x32\n\x05\x44rain\x12\x13.queue.DrainRequest\x1a\x12.queue.PopResponse0\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bqueue.proto\x12\x05queue\x1a\x1egoogle/protobuf/duration.proto\x1a\x1fgoogle/protobuf/timestamp.proto\"\\\n\x05Value\x12\x0f\n\x07payload\x18\x01 \x01(\x04\x12\x33\n\nupdated_at\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.TimestampH\x00\x88\x01\x01\x42\r\n\x0b_updated_at\"*\n\x0bPushRequest\x12\x1b\n\x05value\x18\x01 \x01(\x0b\x32\x0c.queue.Value\"\x0e\n\x0cPushResponse\"C\n\nPopRequest\x12,\n\x04wait\x18\x01 \x01(\x0b\x32\x19.google.protobuf.DurationH\x00\x88\x01\x01\x42\x07\n\x05_wait\"9\n\x0bPopResponse\x12 \n\x05value\x18\x01 \x01(\x0b\x32\x0c.queue.ValueH\x00\x88\x01\x01\x42\x08\n\x06_value\"E\n\x0c\x44rainRequest\x12\x11\n\tmax_items\x18\x01 \x01(\r\x12\x12\n\nchunk_size\x18\x02 \x01(\r\x12\x0e\n\x06\x63ursor\x18\x03 \x01(\t\":\n\nDrainChunk\x12\x1c\n\x06values\x18\x01 \x03(\x0b\x32\x0c.queue.Value\x12\x0e\n\x06\x63ursor\x18\x02 \x01(\t\"\x12\n\x10SubscribeRequest\"0\n\x10PushBatchRequest\x12\x1c\n\x06values\x18\x01 \x03(\x0b\x32\x0c.queue.Value\"[\n\x0fPopBatchRequest\x12\x11\n\tmax_items\x18\x01 \x01(\r\x12,\n\x04wait\x18\x02 \x01(\x0b\x32\x19.google.protobuf.DurationH\x00\x88\x01\x01\x42\x07\n\x05_wait\"0\n\x10PopBatchResponse\x12\x1c\n\x06values\x18\x01 \x03(\x0b\x32\x0c.queue.Value\"?\n\x0c\x42\x61tchRequest\x12\x1c\n\x06values\x18\x01 \x03(\x0b\x32\x0c.queue.Value\x12\x11\n\tmax_items\x18\x02 \x01(\r2\x83\x04\n\x05Queue\x12/\n\x04Push\x12\x12.queue.PushRequest\x1a\x13.queue.PushResponse\x12\x35\n\x08PushMany\x12\x12.queue.PushRequest\x1a\x13.queue.PushResponse(\x01\x12,\n\x03Pop\x12\x11.queue.PopRequest\x1a\x12.queue.PopResponse\x12\x32\n\x05\x44rain\x12\x13.queue.DrainRequest\x1a\x12.queue.PopResponse0\x01\x12\x37\n\x0b\x44rainChunks\x12\x13.queue.DrainRequest\x1a\x11.queue.DrainChunk0\x01\x12:\n\tSubscribe\x12\x17.queue.SubscribeRequest\x1a\x12.queue.PopResponse0\x01\x12\x39\n\tPushBatch\x12\x17.queue.PushBatchRequest\x1a\x13.queue.PushResponse\x12;\n\x08PopBatch\x12\x16.queue.PopBatchRequest\x1a\x17.queue.PopBatchResponse\x12\x43\n\x0f\x45xchangeBatches\x12\x13.queue.BatchRequest\x1a\x17.queue.PopBatchResponse(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'queue_pb2', _globals)
-if _descriptor._USE_C_DESCRIPTORS == False:
-
-  DESCRIPTOR._options = None
-  _globals['_VALUE']._serialized_start=55
-  _globals['_VALUE']._serialized_end=147
-  _globals['_PUSHREQUEST']._serialized_start=149
-  _globals['_PUSHREQUEST']._serialized_end=191
-  _globals['_PUSHRESPONSE']._serialized_start=193
-  _globals['_PUSHRESPONSE']._serialized_end=207
-  _globals['_POPREQUEST']._serialized_start=209
-  _globals['_POPREQUEST']._serialized_end=221
-  _globals['_POPRESPONSE']._serialized_start=223
-  _globals['_POPRESPONSE']._serialized_end=280
-  _globals['_DRAINREQUEST']._serialized_start=282
-  _globals['_DRAINREQUEST']._serialized_end=296
-  _globals['_QUEUE']._serialized_start=299
-  _globals['_QUEUE']._serialized_end=508
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_VALUE']._serialized_start=87
+  _globals['_VALUE']._serialized_end=179
+  _globals['_PUSHREQUEST']._serialized_start=181
+  _globals['_PUSHREQUEST']._serialized_end=223
+  _globals['_PUSHRESPONSE']._serialized_start=225
+  _globals['_PUSHRESPONSE']._serialized_end=239
+  _globals['_POPREQUEST']._serialized_start=241
+  _globals['_POPREQUEST']._serialized_end=308
+  _globals['_POPRESPONSE']._serialized_start=310
+  _globals['_POPRESPONSE']._serialized_end=367
+  _globals['_DRAINREQUEST']._serialized_start=369
+  _globals['_DRAINREQUEST']._serialized_end=438
+  _globals['_DRAINCHUNK']._serialized_start=440
+  _globals['_DRAINCHUNK']._serialized_end=498
+  _globals['_SUBSCRIBEREQUEST']._serialized_start=500
+  _globals['_SUBSCRIBEREQUEST']._serialized_end=518
+  _globals['_PUSHBATCHREQUEST']._serialized_start=520
+  _globals['_PUSHBATCHREQUEST']._serialized_end=568
+  _globals['_POPBATCHREQUEST']._serialized_start=570
+  _globals['_POPBATCHREQUEST']._serialized_end=661
+  _globals['_POPBATCHRESPONSE']._serialized_start=663
+  _globals['_POPBATCHRESPONSE']._serialized_end=711
+  _globals['_BATCHREQUEST']._serialized_start=713
+  _globals['_BATCHREQUEST']._serialized_end=776
+  _globals['_QUEUE']._serialized_start=779
+  _globals['_QUEUE']._serialized_end=1294
 # @@protoc_insertion_point(module_scope)
@@ -1,9 +1,29 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
 """Client and server classes corresponding to protobuf-defined services."""
 import grpc
+import warnings
 
 import queue_pb2 as queue__pb2
 
+GRPC_GENERATED_VERSION = '1.66.1'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + f' but the generated code in queue_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
 
 class QueueStub(object):
     """Missing associated documentation comment in .proto file."""
@@ -18,22 +38,47 @@ class QueueStub(object):
                 '/queue.Queue/Push',
                 request_serializer=queue__pb2.PushRequest.SerializeToString,
                 response_deserializer=queue__pb2.PushResponse.FromString,
-                )
+                _registered_method=True)
         self.PushMany = channel.stream_unary(
                 '/queue.Queue/PushMany',
                 request_serializer=queue__pb2.PushRequest.SerializeToString,
                 response_deserializer=queue__pb2.PushResponse.FromString,
-                )
+                _registered_method=True)
         self.Pop = channel.unary_unary(
                 '/queue.Queue/Pop',
                 request_serializer=queue__pb2.PopRequest.SerializeToString,
                 response_deserializer=queue__pb2.PopResponse.FromString,
-                )
+                _registered_method=True)
         self.Drain = channel.unary_stream(
                 '/queue.Queue/Drain',
                 request_serializer=queue__pb2.DrainRequest.SerializeToString,
                 response_deserializer=queue__pb2.PopResponse.FromString,
-                )
+                _registered_method=True)
+        self.DrainChunks = channel.unary_stream(
+                '/queue.Queue/DrainChunks',
+                request_serializer=queue__pb2.DrainRequest.SerializeToString,
+                response_deserializer=queue__pb2.DrainChunk.FromString,
+                _registered_method=True)
+        self.Subscribe = channel.unary_stream(
+                '/queue.Queue/Subscribe',
+                request_serializer=queue__pb2.SubscribeRequest.SerializeToString,
+                response_deserializer=queue__pb2.PopResponse.FromString,
+                _registered_method=True)
+        self.PushBatch = channel.unary_unary(
+                '/queue.Queue/PushBatch',
+                request_serializer=queue__pb2.PushBatchRequest.SerializeToString,
+                response_deserializer=queue__pb2.PushResponse.FromString,
+                _registered_method=True)
+        self.PopBatch = channel.unary_unary(
+                '/queue.Queue/PopBatch',
+                request_serializer=queue__pb2.PopBatchRequest.SerializeToString,
+                response_deserializer=queue__pb2.PopBatchResponse.FromString,
+                _registered_method=True)
+        self.ExchangeBatches = channel.stream_stream(
+                '/queue.Queue/ExchangeBatches',
+                request_serializer=queue__pb2.BatchRequest.SerializeToString,
+                response_deserializer=queue__pb2.PopBatchResponse.FromString,
+                _registered_method=True)
 
 
 class QueueServicer(object):
@@ -63,6 +108,39 @@ class QueueServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def DrainChunks(self, request, context):
+        """Drain in chunks, each one carries a cursor to resume the drain from after a disconnect.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Subscribe(self, request, context):
+        """Streams values to the subscriber as they are pushed, each value goes to one of the subscribers.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PushBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PopBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ExchangeBatches(self, request_iterator, context):
+        """Each request pushes its values and pops up to max_items values, which are sent in the response.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_QueueServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -86,10 +164,36 @@ def add_QueueServicer_to_server(servicer, server):
                     request_deserializer=queue__pb2.DrainRequest.FromString,
                     response_serializer=queue__pb2.PopResponse.SerializeToString,
             ),
+            'DrainChunks': grpc.unary_stream_rpc_method_handler(
+                    servicer.DrainChunks,
+                    request_deserializer=queue__pb2.DrainRequest.FromString,
+                    response_serializer=queue__pb2.DrainChunk.SerializeToString,
+            ),
+            'Subscribe': grpc.unary_stream_rpc_method_handler(
+                    servicer.Subscribe,
+                    request_deserializer=queue__pb2.SubscribeRequest.FromString,
+                    response_serializer=queue__pb2.PopResponse.SerializeToString,
+            ),
+            'PushBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.PushBatch,
+                    request_deserializer=queue__pb2.PushBatchRequest.FromString,
+                    response_serializer=queue__pb2.PushResponse.SerializeToString,
+            ),
+            'PopBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.PopBatch,
+                    request_deserializer=queue__pb2.PopBatchRequest.FromString,
+                    response_serializer=queue__pb2.PopBatchResponse.SerializeToString,
+            ),
+            'ExchangeBatches': grpc.stream_stream_rpc_method_handler(
+                    servicer.ExchangeBatches,
+                    request_deserializer=queue__pb2.BatchRequest.FromString,
+                    response_serializer=queue__pb2.PopBatchResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'queue.Queue', rpc_method_handlers)
     server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('queue.Queue', rpc_method_handlers)
 
 
  # This class is part of an EXPERIMENTAL API.
@@ -107,11 +211,21 @@ class Queue(object):
             wait_for_ready=None,
             timeout=None,
             metadata=None):
-        return grpc.experimental.unary_unary(request, target, '/queue.Queue/Push',
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/queue.Queue/Push',
             queue__pb2.PushRequest.SerializeToString,
             queue__pb2.PushResponse.FromString,
-            options, channel_credentials,
-            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
 
     @staticmethod
     def PushMany(request_iterator,
@@ -124,11 +238,21 @@ class Queue(object):
             wait_for_ready=None,
             timeout=None,
             metadata=None):
-        return grpc.experimental.stream_unary(request_iterator, target, '/queue.Queue/PushMany',
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/queue.Queue/PushMany',
             queue__pb2.PushRequest.SerializeToString,
             queue__pb2.PushResponse.FromString,
-            options, channel_credentials,
-            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
 
     @staticmethod
     def Pop(request,
@@ -141,11 +265,21 @@ class Queue(object):
             wait_for_ready=None,
             timeout=None,
             metadata=None):
-        return grpc.experimental.unary_unary(request, target, '/queue.Queue/Pop',
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/queue.Queue/Pop',
             queue__pb2.PopRequest.SerializeToString,
             queue__pb2.PopResponse.FromString,
-            options, channel_credentials,
-            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
 
     @staticmethod
     def Drain(request,
@@ -158,8 +292,153 @@ class Queue(object):
             wait_for_ready=None,
             timeout=None,
             metadata=None):
-        return grpc.experimental.unary_stream(request, target, '/queue.Queue/Drain',
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/queue.Queue/Drain',
+            queue__pb2.DrainRequest.SerializeToString,
+            queue__pb2.PopResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DrainChunks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/queue.Queue/DrainChunks',
             queue__pb2.DrainRequest.SerializeToString,
+            queue__pb2.DrainChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Subscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/queue.Queue/Subscribe',
+            queue__pb2.SubscribeRequest.SerializeToString,
             queue__pb2.PopResponse.FromString,
-            options, channel_credentials,
-            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def PushBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/queue.Queue/PushBatch',
+            queue__pb2.PushBatchRequest.SerializeToString,
+            queue__pb2.PushResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def PopBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/queue.Queue/PopBatch',
+            queue__pb2.PopBatchRequest.SerializeToString,
+            queue__pb2.PopBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ExchangeBatches(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/queue.Queue/ExchangeBatches',
+            queue__pb2.BatchRequest.SerializeToString,
+            queue__pb2.PopBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
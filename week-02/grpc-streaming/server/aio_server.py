@@ -0,0 +1,223 @@
+import asyncio
+import grpc
+import queue_pb2
+import queue_pb2_grpc
+
+from collections import deque
+from drain import DrainCursors
+from server import DRAIN_CHUNK_SIZE, MAX_BATCH, batch_size, chunk_size, pop_wait, stamp
+
+
+class DrainableQueue:
+    """
+    Bounded FIFO queue for coroutines of one event loop, which can also detach all values at once
+    and take them back, as the threaded queues do.
+
+    Values are kept in a deque, waiting coroutines in deques of futures: every added value wakes
+    one waiting consumer and every removed one a waiting producer, the longest waiting first.
+    maxsize <= 0 means no limit.
+    """
+
+    def __init__(self, maxsize=0):
+        self.data = deque()
+        self.maxsize = maxsize
+        self._getters = deque()
+        self._putters = deque()
+
+    def qsize(self):
+        return len(self.data)
+
+    def full(self):
+        return 0 < self.maxsize <= len(self.data)
+
+    async def put(self, value):
+        while self.full():
+            await self._wait(self._putters)
+        self.data.append(value)
+        self._wake(self._getters, 1)
+
+    def put_many_nowait(self, values):
+        """
+        Adds all values or none of them, raises asyncio.QueueFull when they do not fit into the free capacity.
+        """
+        if 0 < self.maxsize < len(self.data) + len(values):
+            raise asyncio.QueueFull
+        self.data.extend(values)
+        self._wake(self._getters, len(values))
+
+    async def get(self):
+        while not self.data:
+            await self._wait(self._getters)
+        return self.get_nowait()
+
+    def get_nowait(self):
+        if not self.data:
+            raise asyncio.QueueEmpty
+        value = self.data.popleft()
+        self._wake(self._putters, 1)
+        return value
+
+    def unget(self, value):
+        """
+        Returns a value taken by get() to the front of the queue, even if it is full.
+        """
+        self.data.appendleft(value)
+        self._wake(self._getters, 1)
+
+    def detach(self):
+        data = self.data
+        self.data = deque()
+        # the freed capacity lets waiting producers continue
+        self._wake(self._putters, len(data))
+        return [data]
+
+    def restore(self, deques):
+        # may exceed the capacity for a while, the values were in the queue before
+        for data in reversed(deques):
+            self.data.extendleft(reversed(data))
+        self._wake(self._getters, sum(len(data) for data in deques))
+
+    async def _wait(self, waiters):
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # woken up but cancelled before running, the wakeup goes to the next waiter
+                self._wake(waiters, 1)
+            else:
+                waiters.remove(waiter)
+            raise
+
+    @staticmethod
+    def _wake(waiters, count):
+        while count > 0 and waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                count -= 1
+
+
+class AsyncQueueService(queue_pb2_grpc.QueueServicer):
+    """
+    Queue service on grpc.aio: all calls are coroutines on one event loop, so a slow stream
+    only holds its own coroutine instead of a pool thread, and no locks are needed.
+
+    With a positive capacity, pushes wait while the queue is full. A PushMany stream then stops reading
+    requests, and HTTP/2 flow control slows the producer down until consumers pop values.
+    A PushBatch or ExchangeBatches batch which does not fit is rejected with RESOURCE_EXHAUSTED instead.
+    """
+
+    def __init__(self, capacity=0):
+        self.queue = DrainableQueue(maxsize=capacity)
+        self.cursors = DrainCursors(self.queue)
+
+    async def Push(self, request, context):
+        request.value.updated_at.GetCurrentTime()
+        await self.queue.put(request.value)
+        return queue_pb2.PushResponse()
+
+    async def PushMany(self, request_iterator, context):
+        async for request in request_iterator:
+            request.value.updated_at.GetCurrentTime()
+            await self.queue.put(request.value)
+        return queue_pb2.PushResponse()
+
+    async def Pop(self, request, context):
+        try:
+            return queue_pb2.PopResponse(value=self.queue.get_nowait())
+        except asyncio.QueueEmpty:
+            pass
+        wait = pop_wait(request, context)
+        if not wait or wait <= 0:
+            return queue_pb2.PopResponse()
+        try:
+            return queue_pb2.PopResponse(value=await asyncio.wait_for(self.queue.get(), wait))
+        except asyncio.TimeoutError:
+            return queue_pb2.PopResponse()
+
+    async def Drain(self, request, context):
+        cursor = self.cursors.open(request.max_items)
+        try:
+            while (values := cursor.next_chunk(DRAIN_CHUNK_SIZE)) is not None:
+                for item in values:
+                    yield queue_pb2.PopResponse(value=item)
+        finally:
+            self.cursors.close(cursor)
+
+    async def DrainChunks(self, request, context):
+        try:
+            cursor = self.cursors.resume(request.cursor) if request.cursor else self.cursors.open(request.max_items)
+        except KeyError:
+            await context.abort(grpc.StatusCode.NOT_FOUND, 'unknown or expired drain cursor')
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(e))
+        size = chunk_size(request)
+        completed = False
+        try:
+            for seq, values in cursor.unacked():
+                yield queue_pb2.DrainChunk(values=values, cursor=cursor.position(seq))
+            while (values := cursor.next_chunk(size)) is not None:
+                yield queue_pb2.DrainChunk(values=values, cursor=cursor.position(cursor.seq))
+            completed = True
+        finally:
+            self.cursors.suspend(cursor, completed)
+
+    async def Subscribe(self, request, context):
+        # waiting getters are served in FIFO order, and the next value is taken
+        # only after the previous one was written to the stream, which gives fair dispatch and flow control
+        while True:
+            value = await self.queue.get()
+            sent = False
+            try:
+                yield queue_pb2.PopResponse(value=value)
+                sent = True
+            finally:
+                if not sent:
+                    # the subscriber has gone (CancelledError or GeneratorExit at the yield),
+                    # the value goes back to the front of the queue
+                    self.queue.unget(value)
+
+    async def PushBatch(self, request, context):
+        await self.push_batch(request.values, context)
+        return queue_pb2.PushResponse()
+
+    async def PopBatch(self, request, context):
+        max_items = batch_size(request.max_items)
+        values = self.pop_many(max_items)
+        wait = pop_wait(request, context)
+        if not values and wait and wait > 0:
+            try:
+                values = [await asyncio.wait_for(self.queue.get(), wait)]
+            except asyncio.TimeoutError:
+                return queue_pb2.PopBatchResponse()
+            values.extend(self.pop_many(max_items - 1))
+        return queue_pb2.PopBatchResponse(values=values)
+
+    async def ExchangeBatches(self, request_iterator, context):
+        async for request in request_iterator:
+            await self.push_batch(request.values, context)
+            yield queue_pb2.PopBatchResponse(values=self.pop_many(min(request.max_items, MAX_BATCH)))
+
+    async def push_batch(self, values, context):
+        # a batch call never waits for room: waiting for consumers would stall an ExchangeBatches
+        # stream before its own pops, and a batch larger than the capacity would never fit
+        try:
+            self.queue.put_many_nowait(stamp(values))
+        except asyncio.QueueFull:
+            free = max(self.queue.maxsize - self.queue.qsize(), 0)
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                                f'batch of {len(values)} values does not fit, the queue has room for {free}')
+
+    def pop_many(self, max_items):
+        queue = self.queue
+        return [queue.get_nowait() for _ in range(min(max_items, queue.qsize()))]
+
+
+async def serve(server_addr, capacity=0):
+    server = grpc.aio.server()
+    queue_pb2_grpc.add_QueueServicer_to_server(AsyncQueueService(capacity), server)
+    server.add_insecure_port(server_addr)
+    await server.start()
+    await server.wait_for_termination()
@@ -0,0 +1,172 @@
+import threading
+import time
+import uuid
+
+from collections import deque
+
+# chunks kept after sending in case the client resumes, older ones are considered received
+RETAINED_CHUNKS = 16
+# a drain can be resumed during this many seconds after its stream ends
+CURSOR_TTL = 60.
+
+
+class DrainCursor:
+    """
+    Values detached from the queue by one drain, streamed in numbered chunks.
+
+    The server cannot know which of the sent chunks the client has received, so the last RETAINED_CHUNKS
+    of them are kept and sent again when the client resumes from the last chunk it received.
+    Sent values never return to the queue, so a client which does not resume loses at most
+    the chunks in flight during the disconnect. Values which were not sent return to the queue
+    as soon as the stream ends, and a resumed drain detaches the queue again to continue.
+    """
+
+    def __init__(self, deques, max_items):
+        self.id = uuid.uuid4().hex
+        self.deques = deques
+        self.index = 0
+        # None when the number of drained values is not limited
+        self.remaining = max_items or None
+        self.seq = 0
+        # (seq, values) of the sent chunks which may be not received yet
+        self.sent = deque()
+        self.active = True
+        # True when all values up to max_items were taken, a resumed drain only repeats the sent chunks
+        self.completed = False
+        # monotonic time after which a suspended cursor is forgotten
+        self.expiry = None
+
+    def position(self, seq):
+        return f'{self.id}:{seq}'
+
+    def next_chunk(self, chunk_size):
+        """
+        Takes the next chunk of at most chunk_size values, returns None when the drain is complete.
+        """
+        limit = chunk_size if self.remaining is None else min(chunk_size, self.remaining)
+        while self.index < len(self.deques) and not self.deques[self.index]:
+            self.index += 1
+        if limit == 0 or self.index == len(self.deques):
+            return None
+        data = self.deques[self.index]
+        values = [data.popleft() for _ in range(min(limit, len(data)))]
+        if self.remaining is not None:
+            self.remaining -= len(values)
+        self.seq += 1
+        self.sent.append((self.seq, values))
+        if len(self.sent) > RETAINED_CHUNKS:
+            self.sent.popleft()
+        return values
+
+    def ack(self, seq):
+        """
+        Forgets chunks up to seq, which the client has received.
+        """
+        if not 0 <= seq <= self.seq:
+            raise ValueError(f'cursor position {seq} is not sent yet')
+        if self.sent and seq < self.sent[0][0] - 1:
+            raise ValueError(f'chunks after position {seq} are not retained anymore')
+        while self.sent and self.sent[0][0] <= seq:
+            self.sent.popleft()
+
+    def unacked(self):
+        return list(self.sent)
+
+    def take_leftovers(self):
+        """
+        Returns deques of the values which were not sent and lets them go.
+        """
+        deques = self.deques
+        self.deques = []
+        self.index = 0
+        return deques
+
+
+class DrainCursors:
+    """
+    Drains in progress, by cursor id.
+
+    A suspended cursor holds only its retained chunks. Expired cursors are swept on the next
+    open(), resume() or suspend(): as the ttl is the same for all, they expire in the order
+    they were suspended, so the sweep only looks at the head of a deque and needs no timers.
+    """
+
+    def __init__(self, queue, ttl=CURSOR_TTL):
+        self.queue = queue
+        self.ttl = ttl
+        self.cursors = {}
+        # (expiry, cursor) in the order of suspension, including cursors resumed since
+        self.suspended = deque()
+        self.lock = threading.Lock()
+
+    def open(self, max_items):
+        cursor = DrainCursor(self._detach(max_items or None), max_items)
+        with self.lock:
+            self._sweep()
+            self.cursors[cursor.id] = cursor
+        return cursor
+
+    def resume(self, position):
+        """
+        Continues the drain after the chunk at the position, raises KeyError for an unknown
+        (or expired) cursor and ValueError for a position which cannot be resumed from.
+        """
+        cursor_id, _, seq = position.partition(':')
+        with self.lock:
+            self._sweep()
+            cursor = self.cursors[cursor_id]
+            if cursor.active:
+                raise ValueError('cursor is in use by another drain')
+            cursor.ack(int(seq))
+            cursor.active = True
+            cursor.expiry = None
+        if not cursor.completed:
+            cursor.deques = self._detach(cursor.remaining)
+        return cursor
+
+    def _detach(self, limit):
+        """
+        Detaches the queue and returns at once the values beyond the first limit ones (None for no limit),
+        so that a drain of a few values does not hide the rest from other consumers.
+        """
+        deques = self.queue.detach()
+        if limit is None or sum(len(data) for data in deques) <= limit:
+            return deques
+        taken = []
+        for data in deques:
+            count = min(limit, len(data))
+            taken.append(deque(data.popleft() for _ in range(count)))
+            limit -= count
+        # one deque per detached deque (shard), so restore() puts each back where it came from
+        self.queue.restore(deques)
+        return taken
+
+    def close(self, cursor):
+        """
+        Forgets the drain, the values which were not sent return to the queue.
+        """
+        with self.lock:
+            del self.cursors[cursor.id]
+        self.queue.restore(cursor.take_leftovers())
+
+    def suspend(self, cursor, completed):
+        """
+        Keeps the sent chunks of the drain for resumption until the ttl expires after its stream ended.
+        The values which were not sent return to the queue at once, so other consumers get them.
+        """
+        self.queue.restore(cursor.take_leftovers())
+        with self.lock:
+            self._sweep()
+            cursor.completed = completed
+            cursor.active = False
+            cursor.expiry = time.monotonic() + self.ttl
+            self.suspended.append((cursor.expiry, cursor))
+
+    def _sweep(self):
+        now = time.monotonic()
+        suspended = self.suspended
+        while suspended and suspended[0][0] <= now:
+            expiry, cursor = suspended.popleft()
+            # a cursor resumed and suspended again has a later expiry further in the deque
+            if cursor.expiry == expiry and not cursor.active:
+                del self.cursors[cursor.id]
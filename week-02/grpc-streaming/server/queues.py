@@ -0,0 +1,216 @@
+import itertools
+import threading
+import time
+
+from collections import deque
+from threading import Condition, Lock
+
+
+class Queue:
+    """
+    Single deque guarded by one lock: global FIFO order, but all operations serialize on the lock.
+
+    pop() may wait for a value, waiting consumers are woken in the order they started to wait.
+    """
+
+    def __init__(self):
+        self.data = deque()
+        self.lock = Lock()
+        self.not_empty = Condition(self.lock)
+
+    def push(self, value, key=None):
+        with self.lock:
+            self.data.append(value)
+            self.not_empty.notify()
+
+    def push_many(self, values, key=None):
+        with self.lock:
+            self.data.extend(values)
+            self.not_empty.notify(len(values))
+
+    def pop(self, timeout=None):
+        with self.lock:
+            if timeout:
+                self.not_empty.wait_for(lambda: self.data, timeout)
+            if len(self.data) > 0:
+                return self.data.popleft()
+            else:
+                return None
+
+    def pop_with_shard(self, timeout=None):
+        """
+        pop() which also returns the shard of the value for unpop(), always 0 here.
+        """
+        return self.pop(timeout), 0
+
+    def unpop(self, value, shard=0):
+        """
+        Returns a popped value to the front of the queue.
+        """
+        with self.lock:
+            self.data.appendleft(value)
+            self.not_empty.notify()
+
+    def pop_many(self, max_items, timeout=None):
+        with self.lock:
+            if timeout:
+                self.not_empty.wait_for(lambda: self.data, timeout)
+            data = self.data
+            return [data.popleft() for _ in range(min(max_items, len(data)))]
+
+    def detach(self):
+        """
+        Takes all values out of the queue in O(1) by swapping the deque, returns a list of deques.
+        """
+        with self.lock:
+            data = self.data
+            self.data = deque()
+            return [data]
+
+    def restore(self, deques):
+        """
+        Returns values not consumed from detached deques to the front of the queue.
+        """
+        with self.lock:
+            for data in reversed(deques):
+                self.data.extendleft(reversed(data))
+            self.not_empty.notify(sum(len(data) for data in deques))
+
+
+class ShardedQueue:
+    """
+    N independent queues with their own locks, so concurrent operations on different shards do not contend.
+
+    Ordering guarantees:
+    - 'producer': values pushed with the same key (e.g. by one client) go to the same shard,
+      so each producer's values are popped in the order they were pushed;
+    - 'none': values are spread over the shards round-robin, no order between them is guaranteed.
+
+    A consumer pops from its home shard (chosen by its thread) and steals from the other shards
+    when the home one is empty, so no value waits while some consumer is idle.
+    Consumers waiting in pop() are woken one per pushed value, the longest waiting one first.
+    """
+
+    ORDERINGS = ('producer', 'none')
+
+    def __init__(self, shards=8, ordering='producer'):
+        if shards < 1:
+            raise ValueError('number of shards has to be positive')
+        if ordering not in self.ORDERINGS:
+            raise ValueError(f'unknown ordering {ordering}, expected one of {", ".join(self.ORDERINGS)}')
+        self.shards = [Queue() for _ in range(shards)]
+        self.ordering = ordering
+        # next() on itertools.count is atomic, no lock is needed for round-robin
+        self._next_shard = itertools.count()
+        self._next_home = itertools.count()
+        self._local = threading.local()
+        # consumers waiting in pop() for any shard to get a value
+        self._not_empty = Condition()
+        self._waiting = 0
+
+    def _shard(self, key):
+        if self.ordering == 'producer' and key is not None:
+            return self.shards[hash(key) % len(self.shards)]
+        return self.shards[next(self._next_shard) % len(self.shards)]
+
+    def _home(self):
+        home = getattr(self._local, 'home', None)
+        if home is None:
+            # thread idents are aligned addresses, so consumers are numbered instead
+            home = self._local.home = next(self._next_home) % len(self.shards)
+        return home
+
+    def _notify(self, count):
+        # a consumer starting to wait rescans the shards after registering, so it cannot miss new values
+        if self._waiting:
+            with self._not_empty:
+                self._not_empty.notify(count)
+
+    def push(self, value, key=None):
+        self._shard(key).push(value)
+        self._notify(1)
+
+    def push_many(self, values, key=None):
+        # the whole batch goes to one shard under one lock acquisition
+        self._shard(key).push_many(values)
+        self._notify(len(values))
+
+    def pop(self, timeout=None):
+        return self.pop_with_shard(timeout)[0]
+
+    def pop_with_shard(self, timeout=None):
+        popped = self._pop_any()
+        if popped is None and timeout:
+            popped = self._wait(self._pop_any, timeout)
+        return popped or (None, None)
+
+    def unpop(self, value, shard):
+        # back to the front of its own shard, so the order of its producer is kept
+        self.shards[shard].unpop(value)
+        self._notify(1)
+
+    def pop_many(self, max_items, timeout=None):
+        values = self._pop_many(max_items)
+        if values or not timeout:
+            return values
+        return self._wait(lambda: self._pop_many(max_items) or None, timeout) or []
+
+    def _wait(self, take, timeout):
+        # calls take() until it returns something other than None or the timeout expires
+        deadline = time.monotonic() + timeout
+        with self._not_empty:
+            self._waiting += 1
+            try:
+                while True:
+                    result = take()
+                    remaining = deadline - time.monotonic()
+                    if result is not None or remaining <= 0:
+                        return result
+                    self._not_empty.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+    def _pop_many(self, max_items):
+        shards = self.shards
+        home = self._home()
+        values = []
+        for i in range(len(shards)):
+            shard = shards[(home + i) % len(shards)]
+            if shard.data:
+                values.extend(shard.pop_many(max_items - len(values)))
+                if len(values) >= max_items:
+                    break
+        return values
+
+    def _pop_any(self):
+        # (value, shard index) or None
+        shards = self.shards
+        home = self._home()
+        for i in range(len(shards)):
+            index = (home + i) % len(shards)
+            shard = shards[index]
+            # unlocked emptiness check skips idle shards without touching their locks
+            if shard.data:
+                value = shard.pop()
+                if value is not None:
+                    return value, index
+        return None
+
+    def detach(self):
+        # a deque per shard, so that restore() returns values to the shards they came from
+        return [shard.detach()[0] for shard in self.shards]
+
+    def restore(self, deques):
+        for shard, data in zip(self.shards, deques):
+            if data:
+                shard.restore([data])
+        self._notify(sum(len(data) for data in deques))
+
+
+def make_queue(ordering='fifo', shards=8):
+    """
+    Creates the queue backend: 'fifo' keeps the single locked deque, other orderings use a sharded queue.
+    """
+    if ordering == 'fifo':
+        return Queue()
+    return ShardedQueue(shards, ordering)
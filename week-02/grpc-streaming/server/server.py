@@ -1,64 +1,147 @@
+import asyncio
 import grpc
 import os
 import queue_pb2
 import queue_pb2_grpc
 
-from collections import deque
 from concurrent import futures
 from datetime import datetime
+from drain import DrainCursors
 from google.protobuf.timestamp_pb2 import Timestamp
-from threading import Lock
+from queues import make_queue
 
+# an idle subscriber checks once in this many seconds whether its client is still connected
+SUBSCRIBE_CHECK_INTERVAL = 1.0
+# limit of values returned by one PopBatch or ExchangeBatches response
+MAX_BATCH = 10000
+# values per DrainChunks response by default
+DRAIN_CHUNK_SIZE = 100
 
-class Queue:
-    data = deque()
-    lock = Lock()
 
-    @classmethod
-    def push(cls, value):
-        with cls.lock:
-            cls.data.append(value)
+def pop_wait(request, context):
+    # wait requested by the client, bounded by the call deadline
+    if not request.HasField('wait'):
+        return None
+    wait = request.wait.ToNanoseconds() / 1e9
+    remaining = context.time_remaining()
+    return min(wait, remaining) if remaining is not None else wait
 
-    @classmethod
-    def pop(cls):
-        with cls.lock:
-            if len(cls.data) > 0:
-                return cls.data.popleft()
-            else:
-                return None
 
-    @classmethod
-    def drain(cls):
-        with cls.lock:
-            data = list(cls.data)
-            cls.data = deque()
-            return data
+def batch_size(max_items):
+    return min(max_items, MAX_BATCH) if max_items > 0 else MAX_BATCH
+
+
+def chunk_size(request):
+    return min(request.chunk_size, MAX_BATCH) if request.chunk_size > 0 else DRAIN_CHUNK_SIZE
+
+
+def stamp(values):
+    # one timestamp for the whole batch
+    now = Timestamp()
+    now.GetCurrentTime()
+    for value in values:
+        value.updated_at.CopyFrom(now)
+    return values
 
 
 class QueueService(queue_pb2_grpc.QueueServicer):
+    def __init__(self, queue):
+        self.queue = queue
+        self.cursors = DrainCursors(queue)
+
     def Push(self, request, context):
         request.value.updated_at.GetCurrentTime()
-        Queue.push(request.value)
+        self.queue.push(request.value, context.peer())
         return queue_pb2.PushResponse()
 
     def PushMany(self, request_iterator, context):
+        producer = context.peer()
         for request in request_iterator:
             request.value.updated_at.GetCurrentTime()
-            Queue.push(request.value)
+            self.queue.push(request.value, producer)
         return queue_pb2.PushResponse()
 
     def Pop(self, request, context):
-        return queue_pb2.PopResponse(value=Queue.pop())
+        return queue_pb2.PopResponse(value=self.queue.pop(pop_wait(request, context)))
 
     def Drain(self, request, context):
-        for item in Queue.drain():
-            yield queue_pb2.PopResponse(value=item)
+        # values are detached from the queue at once, but taken from the detached deque one chunk at a time
+        cursor = self.cursors.open(request.max_items)
+        try:
+            while (values := cursor.next_chunk(DRAIN_CHUNK_SIZE)) is not None:
+                for item in values:
+                    yield queue_pb2.PopResponse(value=item)
+        finally:
+            # values left over by max_items or a disconnect return to the queue
+            self.cursors.close(cursor)
+
+    def DrainChunks(self, request, context):
+        try:
+            cursor = self.cursors.resume(request.cursor) if request.cursor else self.cursors.open(request.max_items)
+        except KeyError:
+            context.abort(grpc.StatusCode.NOT_FOUND, 'unknown or expired drain cursor')
+        except ValueError as e:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(e))
+        size = chunk_size(request)
+        completed = False
+        try:
+            # chunks the client may have not received before the disconnect are sent again
+            for seq, values in cursor.unacked():
+                yield queue_pb2.DrainChunk(values=values, cursor=cursor.position(seq))
+            while (values := cursor.next_chunk(size)) is not None:
+                yield queue_pb2.DrainChunk(values=values, cursor=cursor.position(cursor.seq))
+            completed = True
+        finally:
+            self.cursors.suspend(cursor, completed)
+
+    def Subscribe(self, request, context):
+        # a value is taken from the queue only after the previous one was sent, so a slow subscriber
+        # does not receive more than it reads, and values go to the subscribers that wait the longest
+        while context.is_active():
+            value, shard = self.queue.pop_with_shard(SUBSCRIBE_CHECK_INTERVAL)
+            if value is None:
+                continue
+            sent = False
+            try:
+                if not context.is_active():
+                    # the subscriber has gone while waiting
+                    break
+                yield queue_pb2.PopResponse(value=value)
+                sent = True
+            finally:
+                if not sent:
+                    # the subscriber has gone (while waiting or with GeneratorExit at the yield),
+                    # the value goes back to the front of its shard
+                    self.queue.unpop(value, shard)
+
+    def PushBatch(self, request, context):
+        self.queue.push_many(stamp(request.values), context.peer())
+        return queue_pb2.PushResponse()
+
+    def PopBatch(self, request, context):
+        values = self.queue.pop_many(batch_size(request.max_items), pop_wait(request, context))
+        return queue_pb2.PopBatchResponse(values=values)
+
+    def ExchangeBatches(self, request_iterator, context):
+        producer = context.peer()
+        for request in request_iterator:
+            if request.values:
+                self.queue.push_many(stamp(request.values), producer)
+            yield queue_pb2.PopBatchResponse(values=self.queue.pop_many(min(request.max_items, MAX_BATCH)))
 
 
 if __name__ == '__main__':
     server_addr = os.getenv('SERVER_ADDR', 'localhost:51000')
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
-    queue_pb2_grpc.add_QueueServicer_to_server(QueueService(), server)
-    server.add_insecure_port(server_addr)
-    server.start()
-    server.wait_for_termination(timeout=None)
+    # threads (grpc.server on a thread pool) or aio (grpc.aio on an event loop)
+    if os.getenv('SERVER_MODE', 'threads') == 'aio':
+        import aio_server
+        asyncio.run(aio_server.serve(server_addr, int(os.getenv('QUEUE_CAPACITY', '0'))))
+    else:
+        max_workers = int(os.getenv('MAX_WORKERS', '4'))
+        # fifo (single locked deque), producer (per-producer FIFO over shards) or none
+        queue = make_queue(os.getenv('QUEUE_ORDERING', 'fifo'), int(os.getenv('QUEUE_SHARDS', '8')))
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+        queue_pb2_grpc.add_QueueServicer_to_server(QueueService(queue), server)
+        server.add_insecure_port(server_addr)
+        server.start()
+        server.wait_for_termination(timeout=None)
@@ -0,0 +1,152 @@
+import asyncio
+import grpc
+import queue_pb2
+import queue_pb2_grpc
+
+from collections import deque
+
+from aio_server import AsyncQueueService, DrainableQueue
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_put_waits_for_room():
+    async def main():
+        queue = DrainableQueue(maxsize=2)
+        await queue.put(1)
+        await queue.put(2)
+        put = asyncio.create_task(queue.put(3))
+        await asyncio.sleep(0)
+        assert not put.done()
+        assert queue.get_nowait() == 1
+        await put
+        return list(queue.data)
+
+    assert run(main()) == [2, 3]
+
+
+def test_getters_are_woken_in_order():
+    async def main():
+        queue = DrainableQueue()
+        getters = [asyncio.create_task(queue.get()) for _ in range(3)]
+        await asyncio.sleep(0)
+        for value in range(3):
+            await queue.put(value)
+        return await asyncio.gather(*getters)
+
+    assert run(main()) == [0, 1, 2]
+
+
+def test_cancelled_getter_passes_the_value_on():
+    async def main():
+        queue = DrainableQueue()
+        first = asyncio.create_task(queue.get())
+        second = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        await queue.put(1)
+        # the first getter is woken, but cancelled before it runs
+        first.cancel()
+        return await asyncio.wait_for(second, 1)
+
+    assert run(main()) == 1
+
+
+def test_get_timeout_leaves_no_waiter():
+    async def main():
+        queue = DrainableQueue()
+        try:
+            await asyncio.wait_for(queue.get(), 0.01)
+        except asyncio.TimeoutError:
+            pass
+        await queue.put(1)
+        return queue.qsize(), len(queue._getters)
+
+    assert run(main()) == (1, 0)
+
+
+def test_detach_and_restore():
+    async def main():
+        queue = DrainableQueue(maxsize=3)
+        for value in range(3):
+            await queue.put(value)
+        put = asyncio.create_task(queue.put(3))
+        await asyncio.sleep(0)
+        data, = queue.detach()
+        await put
+        data.popleft()
+        getter = asyncio.create_task(queue.get())
+        queue.restore([data, deque()])
+        return await getter, list(queue.data)
+
+    assert run(main()) == (1, [2, 3])
+
+
+def test_subscribe_returns_value_not_sent():
+    async def main():
+        service = AsyncQueueService()
+        for payload in range(2):
+            await service.queue.put(queue_pb2.Value(payload=payload))
+        stream = service.Subscribe(queue_pb2.PopRequest(), None)
+        first = await stream.__anext__()
+        # the stream is closed while the response is waiting at the yield
+        await stream.aclose()
+        return first.value.payload, [value.payload for value in service.queue.data]
+
+    assert run(main()) == (0, [0, 1])
+
+
+async def call_batches(capacity, pushes, exchanges):
+    # runs a server with the capacity, pushes each batch of pushes with PushBatch, then sends
+    # the exchanges batches in one ExchangeBatches stream, returns status codes of all calls,
+    # the number of values in each exchange response and the queue size in the end
+    service = AsyncQueueService(capacity)
+    server = grpc.aio.server()
+    queue_pb2_grpc.add_QueueServicer_to_server(service, server)
+    port = server.add_insecure_port('localhost:0')
+    await server.start()
+    try:
+        async with grpc.aio.insecure_channel(f'localhost:{port}') as channel:
+            stub = queue_pb2_grpc.QueueStub(channel)
+            codes = []
+            for batch in pushes:
+                values = [queue_pb2.Value(payload=i) for i in range(batch)]
+                try:
+                    await stub.PushBatch(queue_pb2.PushBatchRequest(values=values))
+                    codes.append(grpc.StatusCode.OK)
+                except grpc.aio.AioRpcError as e:
+                    codes.append(e.code())
+            popped = []
+            try:
+                requests = [queue_pb2.BatchRequest(values=[queue_pb2.Value(payload=i) for i in range(batch)],
+                                                   max_items=batch) for batch in exchanges]
+                async for response in stub.ExchangeBatches(iter(requests)):
+                    popped.append(len(response.values))
+                codes.append(grpc.StatusCode.OK)
+            except grpc.aio.AioRpcError as e:
+                codes.append(e.code())
+            return codes, popped, service.queue.qsize()
+    finally:
+        await server.stop(None)
+
+
+# a rejected batch is the last request of its exchange: the server aborts the stream on it,
+# and a request written after that would race the abort and fail the call with another code
+
+def test_batch_larger_than_capacity_is_rejected():
+    codes, popped, size = run(asyncio.wait_for(call_batches(10, [11], [11]), 5))
+    assert codes == [grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.RESOURCE_EXHAUSTED]
+    assert popped == [] and size == 0
+
+
+def test_batch_larger_than_free_capacity_is_rejected():
+    codes, popped, size = run(asyncio.wait_for(call_batches(10, [6, 6], [3, 6]), 5))
+    assert codes == [grpc.StatusCode.OK, grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.RESOURCE_EXHAUSTED]
+    assert popped == [3] and size == 6
+
+
+def test_batches_within_capacity_are_exchanged():
+    codes, popped, size = run(asyncio.wait_for(call_batches(10, [3, 3], [3, 3]), 5))
+    assert codes == [grpc.StatusCode.OK] * 3
+    assert popped == [3, 3] and size == 6
@@ -0,0 +1,97 @@
+from drain import DrainCursors
+from queues import Queue, ShardedQueue
+
+
+def interrupted_drain(queue, chunks, ttl=60):
+    cursors = DrainCursors(queue, ttl)
+    cursor = cursors.open(0)
+    sent = [cursor.next_chunk(2) for _ in range(chunks)]
+    cursors.suspend(cursor, False)
+    return cursors, cursor, sent
+
+
+def test_interrupted_drain_returns_values_not_sent():
+    queue = Queue()
+    queue.push_many(range(5))
+    cursors, cursor, sent = interrupted_drain(queue, 1)
+    assert sent == [[0, 1]]
+    assert queue.pop() == 2
+
+
+def test_resumed_drain_repeats_unacked_and_continues():
+    queue = Queue()
+    queue.push_many(range(7))
+    cursors, cursor, sent = interrupted_drain(queue, 2)
+    assert sent == [[0, 1], [2, 3]]
+    queue.push(7)
+    cursor = cursors.resume(cursor.position(1))
+    assert cursor.unacked() == [(2, [2, 3])]
+    assert [cursor.next_chunk(2) for _ in range(3)] == [[4, 5], [6, 7], None]
+
+
+def test_resumed_sharded_drain_keeps_shards():
+    queue = ShardedQueue(shards=2)
+    # int keys hash to themselves, so producer 0 uses shard 0 and producer 1 shard 1
+    queue.push_many([0, 1, 2], key=0)
+    queue.push_many([10, 11, 12], key=1)
+    cursors, cursor, sent = interrupted_drain(queue, 1)
+    assert sent == [[0, 1]]
+    assert [list(shard.data) for shard in queue.shards] == [[2], [10, 11, 12]]
+    queue.push(3, key=0)
+    cursor = cursors.resume(cursor.position(1))
+    assert cursor.unacked() == []
+    assert [cursor.next_chunk(2) for _ in range(4)] == [[2, 3], [10, 11], [12], None]
+
+
+def test_limited_drain_leaves_the_rest_in_the_queue():
+    queue = Queue()
+    queue.push_many(range(3))
+    cursor = DrainCursors(queue).open(1)
+    assert queue.pop_many(5) == [1, 2]
+    assert [cursor.next_chunk(5) for _ in range(2)] == [[0], None]
+
+
+def test_limited_sharded_drain_leaves_the_rest_in_their_shards():
+    queue = ShardedQueue(shards=2)
+    queue.push_many([0, 1], key=0)
+    queue.push_many([10, 11], key=1)
+    cursor = DrainCursors(queue).open(3)
+    assert [list(shard.data) for shard in queue.shards] == [[], [11]]
+    assert [cursor.next_chunk(5) for _ in range(3)] == [[0, 1], [10], None]
+
+
+def test_completed_drain_only_repeats_sent_chunks():
+    queue = Queue()
+    queue.push_many(range(3))
+    cursors = DrainCursors(queue)
+    cursor = cursors.open(2)
+    assert cursor.next_chunk(5) == [0, 1]
+    assert cursor.next_chunk(5) is None
+    cursors.suspend(cursor, True)
+    queue.push(3)
+    cursor = cursors.resume(cursor.position(0))
+    assert cursor.unacked() == [(1, [0, 1])]
+    assert cursor.next_chunk(5) is None
+    assert queue.pop_many(5) == [2, 3]
+
+
+def test_expired_cursors_are_swept():
+    queue = Queue()
+    queue.push_many(range(3))
+    cursors, cursor, sent = interrupted_drain(queue, 1, ttl=0)
+    cursors.open(0)
+    assert cursor.id not in cursors.cursors
+    assert len(cursors.suspended) == 0
+
+
+def test_resumed_cursor_does_not_expire_on_earlier_suspension():
+    queue = Queue()
+    queue.push_many(range(3))
+    cursors, cursor, sent = interrupted_drain(queue, 1)
+    cursor = cursors.resume(cursor.position(1))
+    cursors.suspend(cursor, False)
+    # the first suspension is due, the second one is not
+    cursors.suspended[0] = (0, cursor)
+    cursors.open(0)
+    assert cursors.cursors[cursor.id] is cursor
+    assert len(cursors.suspended) == 1
@@ -0,0 +1,25 @@
+from queues import Queue, ShardedQueue
+
+
+def test_unpop_returns_value_to_the_front():
+    queue = Queue()
+    queue.push_many([1, 2])
+    value, shard = queue.pop_with_shard()
+    queue.unpop(value, shard)
+    assert queue.pop_many(10) == [1, 2]
+
+
+def test_unpop_returns_value_to_its_shard():
+    queue = ShardedQueue(shards=4)
+    queue.push_many([1, 2, 3], key='producer')
+    home = queue.shards.index(next(shard for shard in queue.shards if shard.data))
+    value, shard = queue.pop_with_shard()
+    assert (value, shard) == (1, home)
+    queue.unpop(value, shard)
+    assert list(queue.shards[home].data) == [1, 2, 3]
+    assert [queue.pop() for _ in range(3)] == [1, 2, 3]
+
+
+def test_pop_with_shard_of_empty_queue():
+    assert ShardedQueue(shards=2).pop_with_shard(0.01)[0] is None
+    assert Queue().pop_with_shard(0.01)[0] is None
@@ -0,0 +1,20 @@
+import queue_pb2
+
+from queues import ShardedQueue
+from server import QueueService
+
+
+class ActiveContext:
+    def is_active(self):
+        return True
+
+
+def test_subscribe_returns_value_not_sent_to_its_shard():
+    queue = ShardedQueue(shards=4)
+    queue.push_many([queue_pb2.Value(payload=payload) for payload in range(3)], key='producer')
+    stream = QueueService(queue).Subscribe(queue_pb2.SubscribeRequest(), ActiveContext())
+    first = next(stream)
+    # the stream is closed while the response is waiting at the yield
+    stream.close()
+    assert first.value.payload == 0
+    assert [[value.payload for value in shard.data] for shard in queue.shards if shard.data] == [[0, 1, 2]]
@@ -0,0 +1,99 @@
+from anysystem import Context, Message, Process
+
+
+class Peer(Process):
+    """
+    Anti-entropy over a key-value store in the style of Scuttlebutt.
+
+    Each write is versioned with a Lamport timestamp of its origin, so versions of an origin's writes grow.
+    A peer summarizes its store as a version vector (origin -> max known version) and exchanges only
+    the digest in requests, replies carry just the entries the requester is missing.
+    """
+
+    def __init__(self, proc_id: int, proc_count: int, fanout: int):
+        self._id = proc_id
+        self._origin = str(proc_id)
+        self._proc_count = proc_count
+        self._fanout = fanout
+        # key -> [origin, version, value]
+        self._store = {}
+        # origin -> all its writes up to this version are known (or overwritten)
+        self._digest = {}
+        self._clock = 0
+
+    def on_local_message(self, msg: Message, ctx: Context):
+        if msg.type == 'START':
+            ctx.set_timer("gossip", 1)
+        elif msg.type == 'BROADCAST':
+            self.put('info', msg['info'], ctx)
+        elif msg.type == 'PUT':
+            self.put(msg['key'], msg['value'], ctx)
+
+    def on_message(self, msg: Message, sender: str, ctx: Context):
+        if msg.type == 'SYNC_REQ':
+            digest = msg['digest']
+            if digest != self._digest:
+                resp = Message('SYNC_RESP', {'entries': self.missing(digest), 'digest': dict(self._digest)})
+                ctx.send(resp, sender)
+        elif msg.type == 'SYNC_RESP':
+            digest = msg['digest']
+            self.merge(msg['entries'], digest, ctx)
+            entries = self.missing(digest)
+            if entries:
+                ctx.send(Message('SYNC_PUSH', {'entries': entries, 'digest': dict(self._digest)}), sender)
+        elif msg.type == 'SYNC_PUSH':
+            self.merge(msg['entries'], msg['digest'], ctx)
+
+    def on_timer(self, timer_name: str, ctx: Context):
+        self.gossip(ctx)
+        ctx.set_timer("gossip", 1)
+
+    def put(self, key, value, ctx):
+        self._clock += 1
+        self._store[key] = [self._origin, self._clock, value]
+        self._digest[self._origin] = self._clock
+        ctx.send_local(Message('DELIVER', {'key': key, 'info': value}))
+
+    def missing(self, digest):
+        # entries written after the versions known by the digest owner
+        return {key: entry for key, entry in self._store.items() if entry[1] > digest.get(entry[0], 0)}
+
+    def merge(self, entries, digest, ctx):
+        for key, entry in entries.items():
+            origin, version, value = entry
+            self._clock = max(self._clock, version)
+            current = self._store.get(key)
+            # concurrent writes to the same key are ordered by (version, origin)
+            if current is None or (version, origin) > (current[1], current[0]):
+                self._store[key] = entry
+                ctx.send_local(Message('DELIVER', {'key': key, 'info': value}))
+        # the sender has sent all its entries newer than our digest, so we know everything it knows
+        for origin, version in digest.items():
+            if version > self._digest.get(origin, 0):
+                self._digest[origin] = version
+
+    def gossip(self, ctx):
+        peers = ctx.rng.sample(self._proc_count, self._fanout, self._id)
+        ctx.multicast(Message('SYNC_REQ', {'digest': dict(self._digest)}), [str(peer) for peer in peers])
+
+
+class FullSyncPeer(Peer):
+    """
+    Naive push-pull of the whole store, the baseline for digest-based anti-entropy.
+    """
+
+    def on_message(self, msg: Message, sender: str, ctx: Context):
+        if msg.type == 'SYNC_REQ':
+            digest = msg['digest']
+            self.merge(msg['entries'], digest, ctx)
+            if self.missing(digest):
+                msg = Message('SYNC_PUSH', {'entries': dict(self._store), 'digest': dict(self._digest)})
+                ctx.send(msg, sender)
+        elif msg.type == 'SYNC_PUSH':
+            self.merge(msg['entries'], msg['digest'], ctx)
+
+    def gossip(self, ctx):
+        peers = ctx.rng.sample(self._proc_count, self._fanout, self._id)
+        # data is copied, as the ref codec passes it to receivers by reference
+        msg = Message('SYNC_REQ', {'entries': dict(self._store), 'digest': dict(self._digest)})
+        ctx.multicast(msg, [str(peer) for peer in peers])
@@ -0,0 +1,291 @@
+from __future__ import annotations
+import array
+import bisect
+import collections
+import json
+import mmap
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# event kinds
+SEND = 0
+DELIVER = 1
+DROP = 2
+LOCAL_IN = 3
+LOCAL_OUT = 4
+TIMER_SET = 5
+TIMER_CANCEL = 6
+TIMER_FIRE = 7
+
+KINDS = ['send', 'deliver', 'drop', 'local_in', 'local_out', 'timer_set', 'timer_cancel', 'timer_fire']
+
+# column name -> array typecode, each column is stored in its own file
+COLUMNS = {
+    'time': 'd',
+    'kind': 'B',
+    'src': 'I',
+    'dst': 'I',
+    'name': 'I',
+    'size': 'I',
+}
+
+STRINGS_FILE = 'strings.json'
+
+
+class Record(NamedTuple):
+    time: float
+    kind: str
+    src: str
+    dst: str
+    name: str  # message type or timer name
+    size: int  # payload size, 0 if not serialized
+
+
+class TraceWriter:
+    """
+    Appends events to a columnar trace stored in a directory.
+
+    Each column is a file of fixed-width values, process names and message types
+    (or timer names) are interned into integer ids stored in strings.json.
+    Records are buffered in memory and appended to the files every flush_every events.
+    """
+
+    def __init__(self, path: str, flush_every: int = 1 << 16):
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._flush_every = flush_every
+        self._files = {column: open(os.path.join(path, column + '.col'), 'wb') for column in COLUMNS}
+        self._time = array.array('d')
+        self._kind = array.array('B')
+        self._src = array.array('I')
+        self._dst = array.array('I')
+        self._name = array.array('I')
+        self._size = array.array('I')
+        self._procs: Dict[str, int] = {}
+        self._names: Dict[str, int] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> TraceWriter:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, time: float, kind: int, src: str, dst: str, name: str, size: int = 0):
+        procs = self._procs
+        src_id = procs.get(src)
+        if src_id is None:
+            src_id = procs[src] = len(procs)
+        dst_id = procs.get(dst)
+        if dst_id is None:
+            dst_id = procs[dst] = len(procs)
+        names = self._names
+        name_id = names.get(name)
+        if name_id is None:
+            name_id = names[name] = len(names)
+        self._time.append(time)
+        self._kind.append(kind)
+        self._src.append(src_id)
+        self._dst.append(dst_id)
+        self._name.append(name_id)
+        self._size.append(size)
+        self._count += 1
+        if len(self._time) >= self._flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends buffered records to the column files and saves the string tables.
+        """
+        for column in COLUMNS:
+            buffer = getattr(self, '_' + column)
+            buffer.tofile(self._files[column])
+            del buffer[:]
+            self._files[column].flush()
+        with open(os.path.join(self._path, STRINGS_FILE), 'w') as f:
+            json.dump({'procs': list(self._procs), 'names': list(self._names)}, f)
+
+    def close(self):
+        if self._files:
+            self.flush()
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+
+class TraceLog:
+    """
+    Read-only view of a trace written by TraceWriter.
+
+    Columns are memory-mapped, so queries scan them without creating per-record objects
+    (and without copying when numpy is available). Records are ordered by time.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, STRINGS_FILE)) as f:
+            strings = json.load(f)
+        self.procs: List[str] = strings['procs']
+        self.names: List[str] = strings['names']
+        self._proc_ids = {name: i for i, name in enumerate(self.procs)}
+        self._name_ids = {name: i for i, name in enumerate(self.names)}
+        self._maps = []
+        self._columns = {}
+        for column, typecode in COLUMNS.items():
+            self._columns[column] = self._map(os.path.join(path, column + '.col'), typecode)
+        self._len = min(len(values) for values in self._columns.values())
+
+    def _map(self, filename: str, typecode: str):
+        size = os.path.getsize(filename)
+        if size == 0:
+            return memoryview(b'').cast(typecode)
+        with open(filename, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        view = memoryview(mm)
+        return view[:len(view) - len(view) % array.array(typecode).itemsize].cast(typecode)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __enter__(self) -> TraceLog:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getitem__(self, index: int) -> Record:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('record index out of range')
+        columns = self._columns
+        return Record(columns['time'][index], KINDS[columns['kind'][index]],
+                      self.procs[columns['src'][index]], self.procs[columns['dst'][index]],
+                      self.names[columns['name'][index]], columns['size'][index])
+
+    def close(self):
+        # views have to be released before the maps are closed
+        self._columns = {}
+        for mm in self._maps:
+            try:
+                mm.close()
+            except BufferError:
+                # arrays returned by column() are still alive, the map is closed when they are collected
+                pass
+        self._maps = []
+
+    def column(self, name: str):
+        """
+        Returns the column as a numpy array if numpy is installed, otherwise as a memoryview.
+        No data is copied in both cases.
+        """
+        values = self._columns[name][:self._len]
+        if numpy is not None:
+            return numpy.frombuffer(values, dtype=values.format)
+        return values
+
+    def time_range(self, start: Optional[float] = None, end: Optional[float] = None) -> range:
+        """
+        Returns indexes of records with start <= time < end.
+        """
+        times = self._columns['time'][:self._len]
+        lo = bisect.bisect_left(times, start) if start is not None else 0
+        hi = bisect.bisect_left(times, end) if end is not None else self._len
+        return range(lo, max(lo, hi))
+
+    def _filters(self, kind, src, dst, name) -> Optional[List[tuple]]:
+        # translates filter values to (column, id) pairs, returns None if nothing can match
+        filters = []
+        for column, value, ids in [('kind', kind, None), ('src', src, self._proc_ids),
+                                   ('dst', dst, self._proc_ids), ('name', name, self._name_ids)]:
+            if value is None:
+                continue
+            if column == 'kind':
+                value = KINDS.index(value) if isinstance(value, str) else value
+            else:
+                value = ids.get(value)
+                if value is None:
+                    return None
+            filters.append((column, value))
+        return filters
+
+    def select(self, kind: Union[str, int, None] = None, src: Optional[str] = None, dst: Optional[str] = None,
+               name: Optional[str] = None, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Returns indexes of records matching all given filters: a numpy array if numpy is installed,
+        otherwise a list.
+        """
+        indexes = self.time_range(start, end)
+        filters = self._filters(kind, src, dst, name)
+        if numpy is not None:
+            if filters is None:
+                return numpy.empty(0, dtype=numpy.int64)
+            mask = numpy.ones(len(indexes), dtype=bool)
+            for column, value in filters:
+                mask &= self.column(column)[indexes.start:indexes.stop] == value
+            return numpy.flatnonzero(mask) + indexes.start
+        if filters is None:
+            return []
+        if not filters:
+            return list(indexes)
+        selected = None
+        for column, value in filters:
+            values = self._columns[column]
+            if selected is None:
+                selected = [i for i in indexes if values[i] == value]
+            else:
+                selected = [i for i in selected if values[i] == value]
+        return selected
+
+    def count(self, **filters) -> int:
+        """
+        Returns the number of records matching the filters of select().
+        """
+        return len(self.select(**filters))
+
+    def records(self, **filters) -> Iterator[Record]:
+        """
+        Iterates over records matching the filters of select().
+        """
+        for index in self.select(**filters):
+            yield self[int(index)]
+
+    def counts_by(self, column: str, **filters) -> Dict[str, int]:
+        """
+        Returns the number of records matching the filters of select() for each value of the column,
+        e.g. counts_by('name', kind='send') counts sent messages of each type.
+        """
+        indexes = self.select(**filters)
+        labels = KINDS if column == 'kind' else self.names if column == 'name' else self.procs
+        if numpy is not None:
+            counts = numpy.bincount(self.column(column)[indexes], minlength=len(labels))
+            return {labels[i]: int(c) for i, c in enumerate(counts) if c}
+        values = self._columns[column]
+        counts = collections.Counter(values[i] for i in indexes)
+        return {labels[i]: c for i, c in sorted(counts.items())}
+
+    def sum_by(self, column: str, **filters) -> Dict[str, int]:
+        """
+        Returns the total payload size of records matching the filters of select() for each value of the column.
+        """
+        indexes = self.select(**filters)
+        labels = KINDS if column == 'kind' else self.names if column == 'name' else self.procs
+        if numpy is not None:
+            sums = numpy.bincount(self.column(column)[indexes], weights=self.column('size')[indexes],
+                                  minlength=len(labels))
+            return {labels[i]: int(s) for i, s in enumerate(sums) if s}
+        values = self._columns[column]
+        sizes = self._columns['size']
+        sums = collections.Counter()
+        for i in indexes:
+            sums[values[i]] += sizes[i]
+        return {labels[i]: s for i, s in sorted(sums.items()) if s}
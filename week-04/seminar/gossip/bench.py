@@ -0,0 +1,454 @@
+import argparse
+import functools
+import heapq
+import importlib
+import json
+import pickle
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from anysim import TimerWheel
+from anytrace import TraceLog, TraceWriter
+from anysystem import CODECS, Context, Message, Profiler, SplitMixStream, VisitedStates, get_codec, msgpack
+
+
+INFO = 'Some very important information to propagate to all nodes'
+
+
+def bench_codecs(args):
+    print(f'{"codec":<10} {"send msg/s":>14} {"recv msg/s":>14} {"bytes/msg":>10}')
+    for name in CODECS:
+        if name == 'msgpack' and msgpack is None:
+            continue
+        codec = get_codec(name)
+        ctx = Context(0, codec)
+        start = time.perf_counter()
+        for i in range(args.messages):
+            ctx.send(Message('GOSSIP', {'info': INFO}), str(i % args.nodes))
+        send_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for msg_type, payload, _ in ctx._sent_messages:
+            Message.decode(msg_type, payload, codec)['info']
+        recv_time = time.perf_counter() - start
+
+        payload = ctx._sent_messages[0][1]
+        size = len(payload) if isinstance(payload, (str, bytes)) else '-'
+        print(f'{name:<10} {args.messages / send_time:>14,.0f} {args.messages / recv_time:>14,.0f} {size:>10}')
+
+
+def bench_messages(args):
+    payload = json.dumps({'info': INFO})
+    print(f'{"handler reads":<16} {"eager msg/s":>14} {"lazy msg/s":>14}')
+    for reads_data in [False, True]:
+        start = time.perf_counter()
+        for _ in range(args.messages):
+            msg = Message('GOSSIP_REQ', json.loads(payload))
+            if msg.type == 'GOSSIP_REQ' and reads_data:
+                msg['info']
+        eager_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.messages):
+            msg = Message.from_json('GOSSIP_REQ', payload)
+            if msg.type == 'GOSSIP_REQ' and reads_data:
+                msg['info']
+        lazy_time = time.perf_counter() - start
+
+        label = 'type and data' if reads_data else 'type only'
+        print(f'{label:<16} {args.messages / eager_time:>14,.0f} {args.messages / lazy_time:>14,.0f}')
+
+
+def legacy_get_state(proc):
+    data = {}
+    for name, member in proc.__dict__.items():
+        if not name.startswith('_Process__'):
+            data[name] = bytes.hex(pickle.dumps(member))
+    return json.dumps(data)
+
+
+def bench_snapshots(args):
+    Peer = importlib.import_module(args.impl).Peer
+    proc = Peer(0, args.nodes, 2)
+    ctx = Context(0)
+    proc.on_local_message(Message('BROADCAST', {'info': INFO}), ctx)
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        legacy_state = legacy_get_state(proc)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        proc._stopped = not proc._stopped
+        state = proc.get_state()
+    state_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        proc.set_state(state)
+    restore_time = time.perf_counter() - start
+
+    print(f'Nodes: {args.nodes}')
+    print(f'Implementation: {args.impl}')
+    print(f'hex-in-JSON get_state: {args.iterations / legacy_time:>12,.0f} states/s, {len(legacy_state)} bytes')
+    print(f'raw get_state:         {args.iterations / state_time:>12,.0f} states/s, {len(state.encode())} bytes')
+    print(f'raw set_state:         {args.iterations / restore_time:>12,.0f} states/s')
+
+
+def bench_fingerprints(args):
+    Peer = importlib.import_module(args.impl).Peer
+    proc = Peer(0, args.nodes, 2)
+
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        proc._info = i % 16
+        fingerprint = proc.fingerprint()
+    fingerprint_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        proc._info = i % 16
+        legacy_get_state(proc)
+    legacy_time = time.perf_counter() - start
+
+    visited = VisitedStates()
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        visited.add(fingerprint + i)
+    visited_time = time.perf_counter() - start
+
+    print(f'Nodes: {args.nodes}')
+    print(f'Implementation: {args.impl}')
+    print(f'fingerprint:           {args.iterations / fingerprint_time:>12,.0f} states/s')
+    print(f'hex-in-JSON get_state: {args.iterations / legacy_time:>12,.0f} states/s')
+    print(f'visited set add:       {args.iterations / visited_time:>12,.0f} states/s, '
+          f'false positive rate {visited.false_positive_rate():.2e}')
+
+
+def bench_timers(args):
+    rng = random.Random(args.seed)
+    # timer id -> sequence number of its active event, as in the simulator
+    active = {}
+
+    def is_alive(event):
+        return active.get(event[1]) == event[2]
+
+    print(f'Active timers: {args.timers}, churn operations: {args.churn} ({args.cancels:.0%} cancels)')
+    for name in ['heap', 'wheel']:
+        active.clear()
+        heap = []
+        wheel = TimerWheel(0.01, is_alive) if name == 'wheel' else None
+        seq = 0
+        start = time.perf_counter()
+        for timer in range(args.timers):
+            seq += 1
+            active[timer] = seq
+            event = (rng.uniform(1, args.horizon), timer, seq)
+            if wheel is None or not wheel.schedule(event):
+                heapq.heappush(heap, event)
+        fill_time = time.perf_counter() - start
+
+        # each operation re-arms (overrides) or cancels a random timer, a cancelled timer stays
+        # in the wheel or heap until it is due, as in the simulator
+        start = time.perf_counter()
+        for _ in range(args.churn):
+            timer = rng.randrange(args.timers)
+            if rng.random() < args.cancels:
+                active.pop(timer, None)
+                continue
+            seq += 1
+            active[timer] = seq
+            event = (rng.uniform(1, args.horizon), timer, seq)
+            if wheel is None or not wheel.schedule(event):
+                heapq.heappush(heap, event)
+        churn_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fired = 0
+        if wheel is not None:
+            wheel.advance(args.horizon, heap)
+        while heap:
+            event = heapq.heappop(heap)
+            if is_alive(event):
+                fired += 1
+        drain_time = time.perf_counter() - start
+        print(f'{name:<6} set: {args.timers / fill_time:>11,.0f} ops/s   '
+              f'churn: {args.churn / churn_time:>11,.0f} ops/s   '
+              f'fire: {fired / drain_time:>11,.0f} timers/s')
+
+
+def bench_sampling(args):
+    start = time.perf_counter()
+    peers = tuple(i for i in range(args.nodes) if i != 0)
+    for _ in range(args.iterations):
+        random.sample(peers, args.fanout)
+    list_time = time.perf_counter() - start
+
+    rng = SplitMixStream(args.seed)
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        rng.sample(args.nodes, args.fanout, 0)
+    stream_time = time.perf_counter() - start
+
+    print(f'Nodes: {args.nodes}, fanout: {args.fanout}')
+    print(f'random.sample over peer list: {args.iterations / list_time:>12,.0f} samples/s '
+          f'(including building the list once)')
+    print(f'RandomStream.sample:          {args.iterations / stream_time:>12,.0f} samples/s')
+
+
+def bench_multicast(args):
+    codec = get_codec(args.codec)
+    print(f'Codec: {args.codec}')
+    print(f'{"fanout":>6} {"encode each":>14} {"repeated send":>14} {"multicast":>14}   (messages/s)')
+    for fanout in args.fanouts:
+        targets = [str(i) for i in range(fanout)]
+        rounds = max(1, args.messages // fanout)
+        timings = []
+        for mode in ['encode', 'send', 'multicast']:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                ctx = Context(0, codec)
+                if mode == 'encode':
+                    # send() without payload reuse
+                    for to in targets:
+                        msg = Message('GOSSIP', {'info': INFO})
+                        ctx._sent_messages.append((msg.type, ctx._encode(msg.data), to))
+                elif mode == 'send':
+                    for to in targets:
+                        ctx.send(Message('GOSSIP', {'info': INFO}), to)
+                else:
+                    ctx.multicast(Message('GOSSIP', {'info': INFO}), targets)
+            timings.append(rounds * fanout / (time.perf_counter() - start))
+        print(f'{fanout:>6} {timings[0]:>14,.0f} {timings[1]:>14,.0f} {timings[2]:>14,.0f}')
+
+
+def bench_anti_entropy(args):
+    from simulate import build_system
+    import anti_entropy
+
+    print(f'Nodes: {args.nodes}, fanout: {args.fanout}, bytes per node per round')
+    print(f'{"keys":>8} {"full sync":>12} {"digests":>12}')
+    for keys in args.keys:
+        row = []
+        for peer_class in [anti_entropy.FullSyncPeer, anti_entropy.Peer]:
+            sys = build_system(peer_class, args.nodes, 0, args.fanout, args.seed, 'json')
+            rng = random.Random(args.seed)
+            for key in range(keys):
+                sys.send_local_message(str(rng.randrange(args.nodes)), Message('PUT', {'key': str(key), 'value': INFO}))
+            # let the cluster converge, then measure rounds with one new write
+            sys.step_for_duration(args.warmup)
+            if any(len(sys.process(proc)._store) != keys for proc in sys.process_names()):
+                raise RuntimeError('cluster did not converge in {} rounds'.format(args.warmup))
+            profiler = Profiler()
+            for proc in sys.process_names():
+                profiler.attach(sys.process(proc))
+            sys.send_local_message('0', Message('PUT', {'key': 'new', 'value': INFO}))
+            sys.step_for_duration(args.rounds)
+            sent_bytes = sum(row['sent_bytes'] for row in profiler.report())
+            row.append(sent_bytes / args.nodes / args.rounds)
+        print(f'{keys:>8} {row[0]:>12,.0f} {row[1]:>12,.0f}')
+
+
+def bench_rumors(args):
+    from simulate import build_system
+    from experiment import percentile
+    import rumors
+
+    peer_class = functools.partial(rumors.Peer, buffer_size=args.buffer_size, max_piggyback=args.piggyback)
+    print(f'Nodes: {args.nodes}, fanout: {args.fanout}, updates injected during {args.duration}s')
+    print(f'Buffer size: {args.buffer_size}, rumors per message: {args.piggyback}')
+    print(f'{"updates/s":>10} {"coverage":>9} {"spread":>8} {"conv mean":>10} {"conv p99":>9} {"msgs/node/s":>12}')
+    for rate in args.rates:
+        system = build_system(peer_class, args.nodes, args.drop_rate, args.fanout, args.seed, 'ref')
+        rng = random.Random(args.seed)
+        started = {}
+        delivered = {}
+        last_delivery = {}
+        # updates are injected at random nodes at the given rate, deliveries are checked every 0.1s
+        injected = 0
+        while system.time() < args.time_limit:
+            while injected < rate * min(system.time(), args.duration):
+                injected += 1
+                proc = str(rng.randrange(args.nodes))
+                system.send_local_message(proc, Message('BROADCAST', {'info': INFO}))
+            system.step_for_duration(0.1)
+            for proc in system.process_names():
+                for msg in system.read_local_messages(proc):
+                    rumor_id = msg['id']
+                    if rumor_id not in started:
+                        started[rumor_id] = system.time()
+                    delivered[rumor_id] = delivered.get(rumor_id, 0) + 1
+                    last_delivery[rumor_id] = system.time()
+            # peers keep their gossip timers, so the system never runs out of events, it is done
+            # when no peer has active rumors left
+            if system.time() > args.duration and not any(system.process(proc)._active for proc in system.process_names()):
+                break
+        spread = [r for r, count in delivered.items() if count == args.nodes]
+        times = [last_delivery[r] - started[r] for r in spread] or [0]
+        coverage = sum(delivered.values()) / (len(delivered) * args.nodes)
+        messages = system.network().network_message_count() / args.nodes / system.time()
+        print(f'{rate:>10} {coverage:>9.4f} {len(spread) / len(delivered):>8.3f} {statistics.fmean(times):>10.2f} '
+              f'{percentile(times, 0.99):>9.2f} {messages:>12.2f}')
+
+
+def bench_termination(args):
+    from simulate import build_system
+    import push_pull_stop
+
+    print(f'Fanout: {args.fanout}, network drop rate: {args.drop_rate}, mean over {args.runs} runs')
+    print('residual: fraction of uninformed nodes when all informed nodes have stopped')
+    print(f'{"policy":<10} {"nodes":>7} {"msgs/node":>10} {"residual":>9} {"delivery":>9} {"stop":>7}')
+    for name in args.policies:
+        policy_class = push_pull_stop.POLICIES[name]
+        for nodes in args.nodes:
+            results = []
+            for run in range(args.runs):
+                def peer_class(proc_id, proc_count, fanout):
+                    return push_pull_stop.Peer(proc_id, proc_count, fanout, policy_class())
+                sys = build_system(peer_class, nodes, args.drop_rate, args.fanout, args.seed + run, 'ref')
+                sys.send_local_message('0', Message('BROADCAST', {'info': INFO}))
+                residual = None
+                delivery_time = None
+                while sys.time() < args.time_limit:
+                    more_events = sys.step_for_duration(1.)
+                    peers = [sys.process(proc) for proc in sys.process_names()]
+                    informed = sum(1 for peer in peers if peer._info is not None)
+                    if delivery_time is None and informed == nodes:
+                        delivery_time = sys.time()
+                    if residual is None and all(peer._stopped for peer in peers if peer._info is not None):
+                        residual = 1 - informed / nodes
+                    if not more_events or all(peer._stopped for peer in peers):
+                        break
+                results.append((sys.network().network_message_count() / nodes, residual if residual is not None else 0,
+                                delivery_time or float('nan'), sys.time()))
+            means = [statistics.fmean(values) for values in zip(*results)]
+            print(f'{name:<10} {nodes:>7} {means[0]:>10.2f} {means[1]:>9.4f} {means[2]:>9.1f} {means[3]:>7.1f}')
+
+
+def bench_trace(args):
+    from simulate import build_system
+
+    Peer = importlib.import_module(args.impl).Peer
+    with tempfile.TemporaryDirectory() as path:
+        timings = {}
+        for traced in [False, True]:
+            tracer = TraceWriter(path) if traced else None
+            sys = build_system(Peer, args.nodes, 0, args.fanout, args.seed, args.codec)
+            sys.set_tracer(tracer)
+            start = time.perf_counter()
+            sys.send_local_message('0', Message('BROADCAST', {'info': INFO}))
+            sys.step_for_duration(args.duration)
+            if tracer is not None:
+                tracer.close()
+            timings[traced] = time.perf_counter() - start
+
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        with TraceLog(path) as log:
+            print(f'Nodes: {args.nodes}, events: {sys.event_count()}, trace records: {len(log)}, '
+                  f'{size / len(log):.1f} bytes/record')
+            print(f'simulation:            {timings[False]:>8.2f}s')
+            print(f'simulation with trace: {timings[True]:>8.2f}s')
+            queries = [
+                ('messages by type', lambda: log.counts_by('name', kind='send')),
+                ('bytes by type', lambda: log.sum_by('name', kind='send')),
+                ('deliveries to 0', lambda: log.count(kind='deliver', dst='0')),
+                ('sends in [1, 2)', lambda: log.count(kind='send', start=1, end=2)),
+            ]
+            for label, query in queries:
+                start = time.perf_counter()
+                result = query()
+                print(f'{label + ":":<22} {time.perf_counter() - start:>8.3f}s  {result}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks for the Python side of AnySystem.')
+    subparsers = parser.add_subparsers(dest='bench', required=True)
+
+    codecs_parser = subparsers.add_parser('codecs', help='message codecs throughput')
+    codecs_parser.add_argument('-m', '--messages', type=int, default=200000)
+    codecs_parser.add_argument('-n', '--nodes', type=int, default=1000)
+    codecs_parser.set_defaults(func=bench_codecs)
+
+    messages_parser = subparsers.add_parser('messages', help='eager vs lazy message decoding')
+    messages_parser.add_argument('-m', '--messages', type=int, default=200000)
+    messages_parser.set_defaults(func=bench_messages)
+
+    snapshots_parser = subparsers.add_parser('snapshots', help='process state snapshots throughput')
+    snapshots_parser.add_argument('-i', '--impl', default='push_pull_stop')
+    snapshots_parser.add_argument('-n', '--nodes', type=int, default=1000)
+    snapshots_parser.add_argument('--iterations', type=int, default=10000)
+    snapshots_parser.set_defaults(func=bench_snapshots)
+
+    fingerprints_parser = subparsers.add_parser('fingerprints', help='process state hashing throughput')
+    fingerprints_parser.add_argument('-i', '--impl', default='push_pull_stop')
+    fingerprints_parser.add_argument('-n', '--nodes', type=int, default=1000)
+    fingerprints_parser.add_argument('--iterations', type=int, default=100000)
+    fingerprints_parser.set_defaults(func=bench_fingerprints)
+
+    timers_parser = subparsers.add_parser('timers', help='timer churn with many active timers')
+    timers_parser.add_argument('-t', '--timers', type=int, default=1000000)
+    timers_parser.add_argument('-c', '--churn', type=int, default=1000000)
+    timers_parser.add_argument('--cancels', type=float, default=0.25, help='fraction of churn operations cancelling a timer')
+    timers_parser.add_argument('--horizon', type=float, default=100)
+    timers_parser.add_argument('-s', '--seed', type=int, default=123)
+    timers_parser.set_defaults(func=bench_timers)
+
+    sampling_parser = subparsers.add_parser('sampling', help='peer sampling for gossip')
+    sampling_parser.add_argument('-n', '--nodes', type=int, default=100000)
+    sampling_parser.add_argument('-f', '--fanout', type=int, default=3)
+    sampling_parser.add_argument('--iterations', type=int, default=100000)
+    sampling_parser.add_argument('-s', '--seed', type=int, default=123)
+    sampling_parser.set_defaults(func=bench_sampling)
+
+    multicast_parser = subparsers.add_parser('multicast', help='sending one message to many peers')
+    multicast_parser.add_argument('-m', '--messages', type=int, default=300000)
+    multicast_parser.add_argument('-f', '--fanouts', type=int, nargs='+', default=[3, 10, 100])
+    multicast_parser.add_argument('-c', '--codec', default='json')
+    multicast_parser.set_defaults(func=bench_multicast)
+
+    anti_entropy_parser = subparsers.add_parser('anti-entropy', help='anti-entropy traffic vs store size')
+    anti_entropy_parser.add_argument('-n', '--nodes', type=int, default=100)
+    anti_entropy_parser.add_argument('-f', '--fanout', type=int, default=1)
+    anti_entropy_parser.add_argument('-k', '--keys', type=int, nargs='+', default=[10, 100, 1000])
+    anti_entropy_parser.add_argument('--warmup', type=float, default=30)
+    anti_entropy_parser.add_argument('-r', '--rounds', type=int, default=10)
+    anti_entropy_parser.add_argument('-s', '--seed', type=int, default=123)
+    anti_entropy_parser.set_defaults(func=bench_anti_entropy)
+
+    rumors_parser = subparsers.add_parser('rumors', help='multi-rumor dissemination throughput')
+    rumors_parser.add_argument('-n', '--nodes', type=int, default=500)
+    rumors_parser.add_argument('-f', '--fanout', type=int, default=2)
+    rumors_parser.add_argument('-d', '--drop-rate', type=float, default=0)
+    rumors_parser.add_argument('-r', '--rates', type=float, nargs='+', default=[1, 10, 50, 200])
+    rumors_parser.add_argument('-b', '--buffer-size', type=int, default=64)
+    rumors_parser.add_argument('-p', '--piggyback', type=int, default=8)
+    rumors_parser.add_argument('--duration', type=float, default=20)
+    rumors_parser.add_argument('-t', '--time-limit', type=float, default=120)
+    rumors_parser.add_argument('-s', '--seed', type=int, default=123)
+    rumors_parser.set_defaults(func=bench_rumors)
+
+    termination_parser = subparsers.add_parser('termination', help='push_pull_stop termination policies')
+    termination_parser.add_argument('-p', '--policies', nargs='+', default=['coin', 'counter', 'blind', 'adaptive'])
+    termination_parser.add_argument('-n', '--nodes', type=int, nargs='+', default=[100, 1000, 5000])
+    termination_parser.add_argument('-f', '--fanout', type=int, default=2)
+    termination_parser.add_argument('-d', '--drop-rate', type=float, default=0)
+    termination_parser.add_argument('-r', '--runs', type=int, default=5)
+    termination_parser.add_argument('-t', '--time-limit', type=float, default=200)
+    termination_parser.add_argument('-s', '--seed', type=int, default=123)
+    termination_parser.set_defaults(func=bench_termination)
+
+    trace_parser = subparsers.add_parser('trace', help='tracing overhead and trace queries')
+    trace_parser.add_argument('-i', '--impl', default='push_pull')
+    trace_parser.add_argument('-n', '--nodes', type=int, default=10000)
+    trace_parser.add_argument('-f', '--fanout', type=int, default=2)
+    trace_parser.add_argument('-c', '--codec', default='json')
+    trace_parser.add_argument('-t', '--duration', type=float, default=10)
+    trace_parser.add_argument('-s', '--seed', type=int, default=123)
+    trace_parser.set_defaults(func=bench_trace)
+
+    args = parser.parse_args()
+    args.func(args)
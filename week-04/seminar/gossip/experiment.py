@@ -0,0 +1,113 @@
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+
+from anysystem import Message
+from simulate import build_system, load_impl
+
+
+METRICS = ['delivery_time', 'stop_time', 'messages', 'max_sent', 'mean_sent']
+
+# implementation loaded once in each worker
+peer_class = None
+
+
+def init_worker(impl_path: str):
+    global peer_class
+    peer_class = load_impl(impl_path).Peer
+
+
+def run(params):
+    """
+    Simulates a single seeded run and returns its metrics.
+    """
+    seed, args = params
+    sys = build_system(peer_class, args.nodes, args.drop_rate, args.fanout, seed, args.codec)
+    sys.send_local_message('0', Message('BROADCAST', {'info': 'Some very important information'}))
+    delivery_time = None
+    stop_time = None
+    while True:
+        more_events = sys.step_for_duration(1.)
+        counts = [sys.local_message_count(proc) for proc in sys.process_names()]
+        if delivery_time is None and all(count > 0 for count in counts):
+            delivery_time = sys.time()
+        if stop_time is None and all(count > 1 for count in counts):
+            stop_time = sys.time()
+        if (not more_events
+                or (args.quick_mode and delivery_time is not None)
+                or sys.time() >= args.time_limit):
+            break
+    sent_counts = [sys.sent_message_count(proc) for proc in sys.process_names()]
+    return {
+        'seed': seed,
+        'delivered': sum(1 for count in counts if count > 0),
+        'delivery_time': delivery_time,
+        'stop_time': stop_time,
+        'messages': sys.network().network_message_count(),
+        'max_sent': max(sent_counts),
+        'mean_sent': sum(sent_counts) / len(sent_counts),
+    }
+
+
+def percentile(values, q):
+    values = sorted(values)
+    pos = (len(values) - 1) * q
+    lower = int(pos)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (pos - lower)
+
+
+def aggregate(results):
+    print(f'\n{"metric":<15} {"runs":>6} {"mean":>10} {"p50":>10} {"p90":>10} {"p99":>10} {"max":>10}')
+    for metric in METRICS:
+        values = [r[metric] for r in results if r[metric] is not None]
+        if not values:
+            print(f'{metric:<15} {0:>6}')
+            continue
+        print(f'{metric:<15} {len(values):>6} {statistics.fmean(values):>10.2f} '
+              f'{percentile(values, 0.5):>10.2f} {percentile(values, 0.9):>10.2f} '
+              f'{percentile(values, 0.99):>10.2f} {max(values):>10.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs many seeded gossip simulations in parallel.')
+    parser.add_argument('-i', '--impl', dest='impl_path', required=True,
+                        help='path to Python file with process implementations')
+    parser.add_argument('-n', '--nodes', type=int, default=100, help='number of nodes')
+    parser.add_argument('-d', '--drop-rate', type=float, default=0, help='network drop rate')
+    parser.add_argument('-f', '--fanout', type=int, default=1, help='how many peers to contact on each round')
+    parser.add_argument('-q', '--quick-mode', action='store_true',
+                        help='stop each run when all nodes delivered info')
+    parser.add_argument('-t', '--time-limit', type=int, default=60, help='time limit in simulation')
+    parser.add_argument('-s', '--seed', type=int, default=123, help='seed of the first run')
+    parser.add_argument('-r', '--runs', type=int, default=100, help='number of runs')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('-o', '--output', default='runs.jsonl', help='file to append per-run metrics to')
+    parser.add_argument('-c', '--codec', default='ref', help='message codec: json, binary, msgpack or ref')
+    args = parser.parse_args()
+
+    print(f'Nodes: {args.nodes}')
+    print(f'Fanout: {args.fanout}')
+    print(f'Network drop rate: {args.drop_rate}')
+    print(f'Implementation: {args.impl_path}')
+    print(f'Runs: {args.runs} on {args.jobs} workers')
+
+    started = time.perf_counter()
+    results = []
+    tasks = [(args.seed + i, args) for i in range(args.runs)]
+    with multiprocessing.Pool(args.jobs, init_worker, (args.impl_path,)) as pool, open(args.output, 'a') as out:
+        for result in pool.imap_unordered(run, tasks):
+            results.append(result)
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    elapsed = time.perf_counter() - started
+
+    aggregate(results)
+    print(f'\n{args.runs} runs in {elapsed:.2f}s ({args.runs / elapsed:.1f} runs/s), metrics saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,3 @@
-import random
-
 from anysystem import Context, Message, Process
 
 
@@ -7,7 +5,6 @@ class Peer(Process):
     def __init__(self, proc_id: int, proc_count: int, fanout: int):
         self._id = proc_id
         self._proc_count = proc_count
-        self._peers = [id for id in range(0, self._proc_count) if id != self._id]
         self._fanout = fanout
         self._info = None
 
@@ -35,5 +32,5 @@ class Peer(Process):
         ctx.send_local(Message('STOPPED', {}))
 
     def gossip(self, ctx):
-        for peer in random.sample(self._peers, self._fanout):
-            ctx.send(Message('GOSSIP_REQ', {}), str(peer))
+        peers = ctx.rng.sample(self._proc_count, self._fanout, self._id)
+        ctx.multicast(Message('GOSSIP_REQ', {}), [str(peer) for peer in peers])
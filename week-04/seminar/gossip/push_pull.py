@@ -1,5 +1,3 @@
-import random
-
 from anysystem import Context, Message, Process
 
 
@@ -7,7 +5,6 @@ class Peer(Process):
     def __init__(self, proc_id: int, proc_count: int, fanout: int):
         self._id = proc_id
         self._proc_count = proc_count
-        self._peers = [id for id in range(0, self._proc_count) if id != self._id]
         self._fanout = fanout
         self._info = None
 
@@ -27,6 +24,17 @@ class Peer(Process):
         elif msg.type == 'GOSSIP_RESP' and self._info is None:
             self.got_info(msg['info'], ctx)
 
+    def on_messages(self, batch, ctx: Context):
+        # requests of the whole batch are answered with one multicast, the response is encoded once
+        requesters = []
+        for msg, sender in batch:
+            if msg.type == 'GOSSIP_REQ' and self._info is not None:
+                requesters.append(sender)
+            else:
+                self.on_message(msg, sender, ctx)
+        if requesters:
+            ctx.multicast(Message('GOSSIP_RESP', {'info': self._info}), requesters)
+
     def on_timer(self, timer_name: str, ctx: Context):
         self.gossip(ctx)
         ctx.set_timer("gossip", 1)
@@ -36,5 +44,5 @@ class Peer(Process):
         ctx.send_local(Message('DELIVER', {'info': self._info}))
 
     def gossip(self, ctx):
-        for peer in random.sample(self._peers, self._fanout):
-            ctx.send(Message('GOSSIP_REQ', {'info': self._info}), str(peer))
+        peers = ctx.rng.sample(self._proc_count, self._fanout, self._id)
+        ctx.multicast(Message('GOSSIP_REQ', {'info': self._info}), [str(peer) for peer in peers])
@@ -1,16 +1,93 @@
-import random
+from anysystem import Context, Message, Process, RandomStream
 
-from anysystem import Context, Message, Process
+
+class CoinPolicy:
+    """
+    Feedback coin: stop with the given probability on each duplicate.
+    """
+
+    def __init__(self, prob: float = 0.8):
+        self._prob = prob
+
+    def on_duplicate(self, rng: RandomStream) -> bool:
+        return rng.random() < self._prob
+
+    def on_round(self, rng: RandomStream) -> bool:
+        return False
+
+
+class CounterPolicy:
+    """
+    Feedback counter: stop after k duplicates.
+    """
+
+    def __init__(self, k: int = 2):
+        self._k = k
+        self._duplicates = 0
+
+    def on_duplicate(self, rng: RandomStream) -> bool:
+        self._duplicates += 1
+        return self._duplicates >= self._k
+
+    def on_round(self, rng: RandomStream) -> bool:
+        return False
+
+
+class BlindCoinPolicy:
+    """
+    Blind coin: stop with the given probability after each round, ignoring duplicates.
+    """
+
+    def __init__(self, prob: float = 0.2):
+        self._prob = prob
+
+    def on_duplicate(self, rng: RandomStream) -> bool:
+        return False
+
+    def on_round(self, rng: RandomStream) -> bool:
+        return rng.random() < self._prob
+
+
+class AdaptivePolicy:
+    """
+    Stops on a duplicate with probability equal to the observed duplicate rate
+    (exponentially weighted over received copies of info): duplicates are rare
+    while few nodes are informed and frequent when most of them are.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        self._alpha = alpha
+        self._duplicate_rate = 0.
+        self._got_duplicate = False
+
+    def on_duplicate(self, rng: RandomStream) -> bool:
+        self._duplicate_rate += self._alpha * (1 - self._duplicate_rate)
+        self._got_duplicate = True
+        return rng.random() < self._duplicate_rate
+
+    def on_round(self, rng: RandomStream) -> bool:
+        # a round without duplicates lowers the estimate
+        if not self._got_duplicate:
+            self._duplicate_rate *= 1 - self._alpha
+        self._got_duplicate = False
+        return False
+
+
+POLICIES = {
+    'coin': CoinPolicy,
+    'counter': CounterPolicy,
+    'blind': BlindCoinPolicy,
+    'adaptive': AdaptivePolicy,
+}
 
 
 class Peer(Process):
-    def __init__(self, proc_id: int, proc_count: int, fanout: int):
+    def __init__(self, proc_id: int, proc_count: int, fanout: int, policy=None):
         self._id = proc_id
         self._proc_count = proc_count
-        self._peers = [id for id in range(0, self._proc_count) if id != self._id]
         self._fanout = fanout
         self._info = None
-        self._stop_prob = 0.8
+        self._policy = policy if policy is not None else CoinPolicy()
         self._stopped = False
 
     def on_local_message(self, msg: Message, ctx: Context):
@@ -31,20 +108,21 @@ class Peer(Process):
     def on_timer(self, timer_name: str, ctx: Context):
         self.gossip(ctx)
         ctx.set_timer("gossip", 1)
+        if self._info is not None and not self._stopped and self._policy.on_round(ctx.rng):
+            self.stop(ctx)
 
     def got_info(self, info, ctx):
         if self._info is None:
             self._info = info
             ctx.send_local(Message('DELIVER', {'info': self._info}))
-        else:
-            self.try_stop(ctx)
+        elif not self._stopped and self._policy.on_duplicate(ctx.rng):
+            self.stop(ctx)
 
     def gossip(self, ctx):
-        for peer in random.sample(self._peers, self._fanout):
-            ctx.send(Message('GOSSIP_REQ', {'info': self._info}), str(peer))
-
-    def try_stop(self, ctx):
-        if not self._stopped and random.uniform(0, 1) < self._stop_prob:
-            self._stopped = True
-            ctx.cancel_timer("gossip")
-            ctx.send_local(Message('STOPPED', {}))
+        peers = ctx.rng.sample(self._proc_count, self._fanout, self._id)
+        ctx.multicast(Message('GOSSIP_REQ', {'info': self._info}), [str(peer) for peer in peers])
+
+    def stop(self, ctx):
+        self._stopped = True
+        ctx.cancel_timer("gossip")
+        ctx.send_local(Message('STOPPED', {}))
@@ -0,0 +1,95 @@
+import math
+
+from anysystem import Context, Message, Process
+
+
+class Peer(Process):
+    """
+    Disseminates a stream of rumors (broadcast updates) with a bounded buffer of active ones.
+
+    Each round a peer sends one GOSSIP message to fanout peers carrying up to max_piggyback
+    rumors which were transmitted the least number of times. A rumor is transmitted
+    retransmit_mult * ceil(log2(N + 1)) times, after which it is considered spread and evicted.
+    When the buffer is full, the most transmitted rumor is evicted to make room for a new one.
+
+    Rumor ids are origin:seq, so delivered rumors are remembered per origin as the highest seq
+    up to which all were delivered, plus the delivered seqs above it within seen_window.
+    A rumor more than seen_window behind the newest delivered one of its origin is dropped as stale.
+    """
+
+    def __init__(self, proc_id: int, proc_count: int, fanout: int,
+                 buffer_size: int = 64, max_piggyback: int = 8, retransmit_mult: int = 2,
+                 seen_window: int = 1024):
+        self._id = proc_id
+        self._proc_count = proc_count
+        self._fanout = fanout
+        self._buffer_size = buffer_size
+        self._max_piggyback = max_piggyback
+        self._transmit_limit = retransmit_mult * math.ceil(math.log2(proc_count + 1))
+        self._next_seq = 0
+        # rumor id -> [info, number of transmissions]
+        self._active = {}
+        self._seen_window = seen_window
+        # origin -> seq up to which all rumors were delivered
+        self._delivered = {}
+        # origin -> delivered seqs above that
+        self._delivered_ahead = {}
+
+    def on_local_message(self, msg: Message, ctx: Context):
+        if msg.type == 'START':
+            ctx.set_timer("gossip", 1)
+        elif msg.type == 'BROADCAST':
+            self._next_seq += 1
+            self._delivered[str(self._id)] = self._next_seq
+            self.got_rumor('{}:{}'.format(self._id, self._next_seq), msg['info'], ctx)
+
+    def on_message(self, msg: Message, sender: str, ctx: Context):
+        if msg.type == 'GOSSIP':
+            for rumor_id, info in msg['rumors']:
+                if self.mark_delivered(rumor_id):
+                    self.got_rumor(rumor_id, info, ctx)
+
+    def on_timer(self, timer_name: str, ctx: Context):
+        if self._active:
+            self.gossip(ctx)
+        ctx.set_timer("gossip", 1)
+
+    def mark_delivered(self, rumor_id):
+        """
+        Remembers the rumor as delivered, returns False if it was delivered before or is stale.
+        """
+        origin, _, seq = rumor_id.rpartition(':')
+        seq = int(seq)
+        low = self._delivered.get(origin, 0)
+        ahead = self._delivered_ahead.get(origin)
+        if seq <= low or (ahead is not None and seq in ahead):
+            return False
+        if ahead is None:
+            ahead = self._delivered_ahead[origin] = set()
+        ahead.add(seq)
+        if seq - low > self._seen_window:
+            # the rumors missing below the window are given up on
+            low = seq - self._seen_window
+            ahead.difference_update([s for s in ahead if s <= low])
+        while low + 1 in ahead:
+            low += 1
+            ahead.remove(low)
+        self._delivered[origin] = low
+        return True
+
+    def got_rumor(self, rumor_id, info, ctx):
+        if len(self._active) >= self._buffer_size:
+            del self._active[max(self._active, key=lambda r: self._active[r][1])]
+        self._active[rumor_id] = [info, 0]
+        ctx.send_local(Message('DELIVER', {'id': rumor_id, 'info': info}))
+
+    def gossip(self, ctx):
+        rumors = sorted(self._active, key=lambda r: self._active[r][1])[:self._max_piggyback]
+        peers = ctx.rng.sample(self._proc_count, self._fanout, self._id)
+        msg = Message('GOSSIP', {'rumors': [[rumor_id, self._active[rumor_id][0]] for rumor_id in rumors]})
+        ctx.multicast(msg, [str(peer) for peer in peers])
+        for rumor_id in rumors:
+            rumor = self._active[rumor_id]
+            rumor[1] += len(peers)
+            if rumor[1] >= self._transmit_limit:
+                del self._active[rumor_id]
@@ -0,0 +1,113 @@
+import argparse
+import importlib.util
+import os
+import time
+
+from anysim import System
+from anytrace import TraceWriter
+from anysystem import Message, Profiler, get_codec
+
+
+def load_impl(path: str):
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_system(peer_class, nodes: int, drop_rate: float, fanout: int, seed: int, codec: str,
+                 batch: bool = False) -> System:
+    sys = System(seed, get_codec(codec), batch)
+    sys.network().set_delay(0.1)
+    sys.network().set_drop_rate(drop_rate)
+    for proc_id in range(nodes):
+        # process and node on which it runs have the same name
+        name = str(proc_id)
+        sys.add_node(name)
+        sys.add_process(name, peer_class(proc_id, nodes, fanout), name)
+        sys.send_local_message(name, Message('START', {}))
+    return sys
+
+
+def get_stats(sys: System):
+    delivered_count = 0
+    stopped_count = 0
+    for proc in sys.process_names():
+        outbox = sys.local_outbox(proc)
+        if len(outbox) > 0:
+            assert outbox[0].type == 'DELIVER'
+            delivered_count += 1
+        if len(outbox) == 2:
+            assert outbox[1].type == 'STOPPED'
+            stopped_count += 1
+        assert len(outbox) <= 2
+    return delivered_count, stopped_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gossip simulator (pure Python).')
+    parser.add_argument('-i', '--impl', dest='impl_path', required=True,
+                        help='path to Python file with process implementations')
+    parser.add_argument('-n', '--nodes', type=int, default=10, help='number of nodes')
+    parser.add_argument('-d', '--drop-rate', type=float, default=0, help='network drop rate')
+    parser.add_argument('-f', '--fanout', type=int, default=1, help='how many peers to contact on each round')
+    parser.add_argument('-q', '--quick-mode', action='store_true',
+                        help='stop simulation when all nodes delivered info')
+    parser.add_argument('-t', '--time-limit', type=int, default=60, help='time limit in simulation')
+    parser.add_argument('-s', '--seed', type=int, default=123, help='random seed')
+    parser.add_argument('-c', '--codec', default='json', help='message codec: json, binary, msgpack or ref')
+    parser.add_argument('-b', '--batch', action='store_true',
+                        help='deliver messages arriving at the same time in one on_messages call')
+    parser.add_argument('-p', '--profile', metavar='FILE', nargs='?', const='-',
+                        help='profile process callbacks, print the report or save it as JSON to FILE')
+    parser.add_argument('--trace', metavar='DIR', help='record all events into a trace in DIR')
+    args = parser.parse_args()
+
+    peer_class = load_impl(args.impl_path).Peer
+    print(f'Nodes: {args.nodes}')
+    print(f'Fanout: {args.fanout}')
+    print(f'Network drop rate: {args.drop_rate}')
+    print(f'Implementation: {args.impl_path}')
+
+    tracer = TraceWriter(args.trace) if args.trace else None
+    sys = build_system(peer_class, args.nodes, args.drop_rate, args.fanout, args.seed, args.codec, args.batch)
+    sys.set_tracer(tracer)
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        for proc in sys.process_names():
+            profiler.attach(sys.process(proc))
+    started = time.perf_counter()
+    sys.send_local_message('0', Message('BROADCAST', {
+        'info': 'Some very important information to propagate to all nodes',
+    }))
+    print(f'\n{"time":<10} {"delivered":<12} {"stopped":<12} {"messages":<12}')
+    while True:
+        more_events = sys.step_for_duration(1.)
+        delivered, stopped = get_stats(sys)
+        print(f'{sys.time():<10g} {delivered:<12} {stopped:<12} {sys.network().network_message_count():<12}')
+        if (not more_events
+                or (args.quick_mode and delivered == args.nodes)
+                or sys.time() >= args.time_limit):
+            break
+    elapsed = time.perf_counter() - started
+    if tracer is not None:
+        tracer.close()
+
+    sent_counts = [sys.sent_message_count(proc) for proc in sys.process_names()]
+    print(f'\nMessages sent by each node: max={max(sent_counts)}, min={min(sent_counts)}, '
+          f'mean={sum(sent_counts) / len(sent_counts):.2f}')
+    print(f'Simulated {sys.event_count()} events in {elapsed:.2f}s ({sys.event_count() / elapsed:,.0f} events/s)')
+    if profiler is not None:
+        if args.profile == '-':
+            print('\n' + profiler.format_report())
+        else:
+            profiler.save(args.profile)
+            print(f'Profile saved to {args.profile}')
+    if tracer is not None:
+        print(f'Trace of {len(tracer)} records saved to {args.trace}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class Cluster:
+    """
+    State of all peers as arrays, advanced one gossip round (timer period) at a time.
+
+    Within a round all requests are delivered before all responses, as with the simulator's
+    fixed network delay. Requests are processed in the order they were sent, i.e. by sender id,
+    so a node informed by a push answers the requests that reach it after that push.
+    """
+
+    def __init__(self, nodes: int, fanout: int, drop_rate: float, seed: int, stop_prob: float = 0.8):
+        if not 0 < fanout < nodes:
+            raise ValueError('fanout has to be in [1, nodes - 1]')
+        self.nodes = nodes
+        self.fanout = fanout
+        self.drop_rate = drop_rate
+        self.stop_prob = stop_prob
+        self.rng = np.random.default_rng(seed)
+        self.informed = np.zeros(nodes, dtype=bool)
+        self.stopped = np.zeros(nodes, dtype=bool)
+        self.sent = np.zeros(nodes, dtype=np.int64)
+        self.messages = 0
+        self.responses = 0
+
+    def broadcast(self, node: int, stops: bool = False):
+        self.informed[node] = True
+        if stops:
+            self.stopped[node] = True
+
+    def sample_peers(self, senders: np.ndarray) -> np.ndarray:
+        """
+        Returns fanout distinct random peers (excluding itself) for each sender.
+        """
+        peers = self.rng.integers(0, self.nodes - 1, size=(len(senders), self.fanout))
+        peers += peers >= senders[:, None]
+        if self.fanout > 1:
+            while True:
+                ordered = np.sort(peers, axis=1)
+                dup = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+                if not dup.any():
+                    break
+                redraw = self.rng.integers(0, self.nodes - 1, size=(int(dup.sum()), self.fanout))
+                redraw += redraw >= senders[dup][:, None]
+                peers[dup] = redraw
+        return peers
+
+    def send(self, senders: np.ndarray, peers: np.ndarray) -> np.ndarray:
+        """
+        Accounts messages from senders to peers, returns mask of delivered ones.
+        """
+        self.messages += peers.size
+        self.sent += np.bincount(senders, minlength=self.nodes) * peers.shape[1]
+        if self.drop_rate:
+            return self.rng.random(peers.shape) >= self.drop_rate
+        return np.ones(peers.shape, dtype=bool)
+
+    def respond(self, peers: np.ndarray, delivered: np.ndarray, answers: np.ndarray) -> np.ndarray:
+        """
+        Sends responses to delivered requests where answers is set, returns mask of delivered responses.
+        """
+        responding = delivered & answers
+        count = int(responding.sum())
+        self.messages += count
+        self.responses += count
+        self.sent += np.bincount(peers[responding], minlength=self.nodes)
+        if self.drop_rate and count:
+            responding[responding] = self.rng.random(count) >= self.drop_rate
+        return responding
+
+    def push(self, senders: np.ndarray, peers: np.ndarray, delivered: np.ndarray,
+             informed: np.ndarray) -> np.ndarray:
+        """
+        Delivers requests carrying info to peers. Returns which requests find their peer informed.
+        """
+        order = np.arange(peers.size).reshape(peers.shape)
+        pushes = delivered & informed[senders][:, None]
+        first_push = np.full(self.nodes, peers.size)
+        np.minimum.at(first_push, peers[pushes], order[pushes])
+        self.informed[peers[pushes]] = True
+        return informed[peers] | (order > first_push[peers])
+
+
+def push_round(cluster: Cluster):
+    senders = np.flatnonzero(cluster.informed)
+    peers = cluster.sample_peers(senders)
+    delivered = cluster.send(senders, peers)
+    cluster.informed[peers[delivered]] = True
+
+
+def pull_round(cluster: Cluster):
+    senders = np.flatnonzero(~cluster.informed)
+    peers = cluster.sample_peers(senders)
+    delivered = cluster.send(senders, peers)
+    responses = cluster.respond(peers, delivered, cluster.informed[peers])
+    got_info = senders[responses.any(axis=1)]
+    cluster.informed[got_info] = True
+    cluster.stopped[got_info] = True
+
+
+def push_pull_round(cluster: Cluster):
+    informed = cluster.informed.copy()
+    senders = np.arange(cluster.nodes)
+    peers = cluster.sample_peers(senders)
+    delivered = cluster.send(senders, peers)
+    answers = cluster.push(senders, peers, delivered, informed)
+    responses = cluster.respond(peers, delivered, answers)
+    cluster.informed[senders[responses.any(axis=1)]] = True
+
+
+def push_pull_stop_round(cluster: Cluster):
+    informed = cluster.informed.copy()
+    senders = np.flatnonzero(~cluster.stopped)
+    peers = cluster.sample_peers(senders)
+    delivered = cluster.send(senders, peers)
+    # pushes are delivered before responses
+    answers = cluster.push(senders, peers, delivered, informed)
+    responses = cluster.respond(peers, delivered, answers)
+    got = responses.sum(axis=1)
+    # the first response informs a node, all other ones are duplicates
+    duplicates = got - ((got > 0) & ~cluster.informed[senders])
+    cluster.informed[senders[got > 0]] = True
+    # each duplicate stops the node with stop_prob
+    stop = cluster.rng.random(len(senders)) >= (1 - cluster.stop_prob) ** duplicates
+    cluster.stopped[senders[stop & (duplicates > 0)]] = True
+
+
+ROUNDS = {
+    'push': push_round,
+    'pull': pull_round,
+    'push_pull': push_pull_round,
+    'push_pull_stop': push_pull_stop_round,
+}
+
+
+def simulate(variant: str, nodes: int, fanout: int, drop_rate: float, seed: int,
+             quick_mode: bool, time_limit: int, verbose: bool = True) -> dict:
+    cluster = Cluster(nodes, fanout, drop_rate, seed)
+    round_fn = ROUNDS[variant]
+    # in pull the broadcasting node stops at once, as it does not need to ask anybody
+    cluster.broadcast(0, stops=variant == 'pull')
+    stops = variant in ('pull', 'push_pull_stop')
+    delivery_time = None
+    stop_time = None
+    if verbose:
+        print(f'\n{"time":<10} {"delivered":<12} {"stopped":<12} {"messages":<12}')
+    # like the simulator output at time t: state after the previous rounds
+    # and messages sent up to round t, except for responses which are sent later
+    for round_no in range(1, time_limit + 1):
+        delivered = int(cluster.informed.sum())
+        stopped = int(cluster.stopped.sum())
+        responses = cluster.responses
+        if not (stops and stopped == nodes):
+            round_fn(cluster)
+        messages = cluster.messages - (cluster.responses - responses)
+        if verbose:
+            print(f'{round_no:<10} {delivered:<12} {stopped:<12} {messages:<12}')
+        if delivery_time is None and delivered == nodes:
+            delivery_time = round_no
+        if stops and stop_time is None and stopped == nodes:
+            stop_time = round_no
+        if (quick_mode and delivery_time is not None) or stop_time is not None:
+            break
+    return {
+        'delivered': int(cluster.informed.sum()),
+        'delivery_time': delivery_time,
+        'stop_time': stop_time,
+        'messages': messages,
+        'max_sent': int(cluster.sent.max()),
+        'mean_sent': float(cluster.sent.mean()),
+    }
+
+
+def cross_check(args, variant: str):
+    """
+    Compares mean metrics of vectorized and object-based simulations over several seeds.
+    """
+    import experiment
+
+    experiment.init_worker(args.impl_path)
+    params = SimpleNamespace(nodes=args.nodes, drop_rate=args.drop_rate, fanout=args.fanout, codec='ref',
+                             quick_mode=args.quick_mode, time_limit=args.time_limit)
+    runs = {
+        'vectorized': [simulate(variant, args.nodes, args.fanout, args.drop_rate, args.seed + i,
+                                args.quick_mode, args.time_limit, False) for i in range(args.cross_check)],
+        'objects': [experiment.run((args.seed + i, params)) for i in range(args.cross_check)],
+    }
+    print(f'\nMean over {args.cross_check} runs')
+    print(f'{"mode":<12} {"delivered":>10} {"delivery":>10} {"stop":>10} {"messages":>10}')
+    for mode, results in runs.items():
+        def mean(metric):
+            values = [r[metric] for r in results if r[metric] is not None]
+            return f'{sum(values) / len(values):.2f}' if values else '-'
+        print(f'{mode:<12} {mean("delivered"):>10} {mean("delivery_time"):>10} '
+              f'{mean("stop_time"):>10} {mean("messages"):>10}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vectorized gossip simulator for large clusters.')
+    parser.add_argument('-i', '--impl', dest='impl_path', required=True,
+                        help='gossip variant, one of {}.py'.format('.py, '.join(ROUNDS)))
+    parser.add_argument('-n', '--nodes', type=int, default=10, help='number of nodes')
+    parser.add_argument('-d', '--drop-rate', type=float, default=0, help='network drop rate')
+    parser.add_argument('-f', '--fanout', type=int, default=1, help='how many peers to contact on each round')
+    parser.add_argument('-q', '--quick-mode', action='store_true',
+                        help='stop simulation when all nodes delivered info')
+    parser.add_argument('-t', '--time-limit', type=int, default=60, help='rounds limit')
+    parser.add_argument('-s', '--seed', type=int, default=123, help='random seed')
+    parser.add_argument('-x', '--cross-check', type=int, default=0, metavar='RUNS',
+                        help='compare with the object-based simulator over RUNS seeds')
+    args = parser.parse_args()
+
+    variant = os.path.splitext(os.path.basename(args.impl_path))[0]
+    if variant not in ROUNDS:
+        parser.error('unknown gossip variant {}'.format(variant))
+    print(f'Nodes: {args.nodes}')
+    print(f'Fanout: {args.fanout}')
+    print(f'Network drop rate: {args.drop_rate}')
+    print(f'Implementation: {args.impl_path} (vectorized)')
+
+    started = time.perf_counter()
+    result = simulate(variant, args.nodes, args.fanout, args.drop_rate, args.seed,
+                      args.quick_mode, args.time_limit)
+    elapsed = time.perf_counter() - started
+    print(f'\nMessages sent by each node: max={result["max_sent"]}, mean={result["mean_sent"]:.2f}')
+    print(f'Simulated in {elapsed:.2f}s')
+
+    if args.cross_check:
+        cross_check(args, variant)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,772 @@
+from __future__ import annotations
+import abc
+import hashlib
+import json
+import marshal
+import math
+import pickle
+import random
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+JSON = Union[Dict[str, "JSON"], List["JSON"], str, int, float, bool, None]
+
+
+class Message:
+    """
+    Message with a type and a dict payload. Received messages keep the encoded payload
+    and decode it on first access. Message types are interned, so comparing them
+    with string literals is an identity check.
+    """
+    __slots__ = ('_type', '_data', '_payload', '_codec')
+
+    def __init__(self, message_type: str, data: Dict[str, Any]):
+        self._type = sys.intern(message_type)
+        self._data = data
+        self._payload = None
+        self._codec = None
+
+    @property
+    def type(self) -> str:
+        return self._type
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        data = self._data
+        if data is None:
+            data = self._data = self._codec.decode(self._payload)
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        data = self._data
+        if data is None:
+            data = self.data
+        return data[key]
+
+    def __setitem__(self, key: str, value: Any):
+        self.data[key] = value
+
+    def remove(self, key: str):
+        self.data.pop(key, None)
+
+    def __reduce__(self):
+        return Message, (self._type, self.data)
+
+    @staticmethod
+    def from_json(message_type: str, json_str: str) -> Message:
+        return Message.decode(message_type, json_str, _JSON_CODEC)
+
+    @staticmethod
+    def decode(message_type: str, payload: Any, codec: Codec) -> Message:
+        msg = Message.__new__(Message)
+        msg._type = sys.intern(message_type)
+        msg._data = None
+        msg._payload = payload
+        msg._codec = codec
+        return msg
+
+
+class Codec:
+    """
+    Encodes message payloads passed between processes.
+    """
+    name = ''
+    # whether Context detects repeated payloads to encode them once,
+    # worth it only if encoding is slower than comparing data with the previous one
+    reuse_payloads = False
+
+    def encode(self, data: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    def decode(self, payload: Any) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """
+    JSON strings, the only format understood by the AnySystem runtime.
+    """
+    name = 'json'
+    reuse_payloads = True
+    encode = staticmethod(json.dumps)
+    decode = staticmethod(json.loads)
+
+
+class BinaryCodec(Codec):
+    """
+    Compact binary encoding via marshal. Tuples survive encoding (JSON turns them into lists).
+    """
+    name = 'binary'
+    encode = staticmethod(marshal.dumps)
+    decode = staticmethod(marshal.loads)
+
+
+class MsgpackCodec(Codec):
+    """
+    MessagePack encoding, available when the msgpack package is installed.
+    """
+    name = 'msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError('msgpack codec requires the msgpack package')
+        self.encode = msgpack.packb
+        self.decode = msgpack.unpackb
+
+
+class RefCodec(Codec):
+    """
+    Passes payloads by reference when sender and receiver live in the same interpreter.
+    Only the top-level dict is copied, so nested values must not be mutated after sending.
+    """
+    name = 'ref'
+    encode = staticmethod(dict)
+    decode = staticmethod(dict)
+
+
+_JSON_CODEC = JsonCodec()
+
+CODECS: Dict[str, type] = {
+    JsonCodec.name: JsonCodec,
+    BinaryCodec.name: BinaryCodec,
+    MsgpackCodec.name: MsgpackCodec,
+    RefCodec.name: RefCodec,
+}
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Returns codec instance by its name.
+    """
+    if name not in CODECS:
+        raise ValueError('unknown codec {}, expected one of {}'.format(name, ', '.join(CODECS)))
+    return CODECS[name]()
+
+
+class RandomStream:
+    """
+    Source of random numbers for a process with fast sampling of process ids.
+    """
+
+    def _next64(self) -> int:
+        raise NotImplementedError
+
+    def random(self) -> float:
+        """
+        Returns a random float in [0, 1).
+        """
+        return (self._next64() >> 11) * (1. / (1 << 53))
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def randrange(self, n: int) -> int:
+        """
+        Returns a random int in [0, n).
+        """
+        return (self._next64() * n) >> 64
+
+    def sample(self, n: int, k: int, exclude: Optional[int] = None) -> List[int]:
+        """
+        Returns k distinct random ints from [0, n) except exclude, using O(k) time and memory (Floyd's algorithm).
+        """
+        if exclude is not None:
+            return [x + 1 if x >= exclude else x for x in self.sample(n - 1, k)]
+        if not 0 <= k <= n:
+            raise ValueError('sample size has to be in [0, {}]'.format(n))
+        chosen = []
+        seen = set()
+        for j in range(n - k, n):
+            x = self.randrange(j + 1)
+            if x in seen:
+                x = j
+            seen.add(x)
+            chosen.append(x)
+        return chosen
+
+
+class SplitMixStream(RandomStream):
+    """
+    Seeded stream (SplitMix64) with an 8-byte state, cheap enough to give one to each process.
+    """
+
+    def __init__(self, seed: Union[int, str]):
+        if isinstance(seed, str):
+            seed = int.from_bytes(hashlib.blake2b(seed.encode(), digest_size=8).digest(), 'little')
+        self._state = seed & 0xFFFFFFFFFFFFFFFF
+
+    def _next64(self) -> int:
+        self._state = z = (self._state + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return z ^ (z >> 31)
+
+
+class GlobalStream(RandomStream):
+    """
+    Stream drawing from the global random module, which the runtime seeds.
+    """
+
+    def _next64(self) -> int:
+        return random.getrandbits(64)
+
+
+_GLOBAL_STREAM = GlobalStream()
+
+
+class Context(object):
+    codec: Codec = _JSON_CODEC
+
+    def __init__(self, time: float, codec: Optional[Codec] = None, rng: Optional[RandomStream] = None):
+        self._time = time
+        self._rng = rng if rng is not None else _GLOBAL_STREAM
+        if codec is not None:
+            self.codec = codec
+        self._encode = self.codec.encode
+        self._reuse_payloads = self.codec.reuse_payloads
+        self._sent_messages: List[Tuple[str, str, str]] = list()
+        self._sent_local_messages: List[tuple[str, str]] = list()
+        self._timer_actions: List[Tuple[str, float, bool]] = list()
+        self._timer_index: Dict[str, int] = dict()
+        # copy of the last encoded data and its payload, to encode repeated messages once
+        self._last_data: Optional[Dict[str, Any]] = None
+        self._last_payload: Any = None
+
+    def send(self, msg: Message, to: str):
+        """
+        Sends a message to the specified process.
+        """
+        if len(msg.type) > 50:
+            raise ValueError('message type length exceeds the limit of 50 characters')
+        if not isinstance(to, str):
+            raise TypeError('to argument has to be string, not {}'.format(type(to)))
+        self._sent_messages.append((msg.type, self._encode_payload(msg), to))
+
+    def multicast(self, msg: Message, targets: List[str]):
+        """
+        Sends a message to each of the specified processes, the payload is encoded once.
+        """
+        if len(msg.type) > 50:
+            raise ValueError('message type length exceeds the limit of 50 characters')
+        msg_type = msg.type
+        payload = self._encode_payload(msg)
+        sent_messages = self._sent_messages
+        for to in targets:
+            if not isinstance(to, str):
+                raise TypeError('to argument has to be string, not {}'.format(type(to)))
+            sent_messages.append((msg_type, payload, to))
+
+    def send_local(self, msg: Message):
+        """
+        Sends a _local_ message.
+        """
+        if len(msg.type) > 50:
+            raise ValueError('message type length exceeds the limit of 50 characters')
+        self._sent_local_messages.append((msg.type, self._encode_payload(msg)))
+
+    def _encode_payload(self, msg: Message) -> Any:
+        # forward the received payload as is if it was never decoded
+        data = msg._data
+        if data is None:
+            if type(msg._codec) is type(self.codec):
+                return msg._payload
+            data = msg.data
+        if not self._reuse_payloads:
+            return self._encode(data)
+        # reuse the payload if the same data was sent in this callback before,
+        # only data with immutable values is remembered, so it can't change after sending
+        last = self._last_data
+        if last is not None and len(data) == len(last):
+            for (key, value), (last_key, last_value) in zip(data.items(), last.items()):
+                # types are compared too, as 1, 1.0 and True are equal but encoded differently
+                if (key != last_key or value != last_value
+                        or type(key) is not type(last_key) or type(value) is not type(last_value)):
+                    break
+            else:
+                return self._last_payload
+        payload = self._encode(data)
+        for key, value in data.items():
+            if type(value) not in _REUSABLE_TYPES or type(key) is not str:
+                return payload
+        self._last_data = dict(data)
+        self._last_payload = payload
+        return payload
+
+    def set_timer(self, timer_name: str, delay: float):
+        """
+        Sets a timer that will trigger on_timer callback after the specified delay.
+        If there is an active timer with this name, its delay is overridden.
+        """
+        if not isinstance(timer_name, str):
+            raise TypeError('timer_name argument has to be str, not {}'.format(type(timer_name)))
+        if len(timer_name) > 50:
+            raise ValueError('timer_name length exceeds the limit of 50 characters')
+        if not isinstance(delay, (int, float)):
+            raise TypeError('delay argument has to be int or float, not {}'.format(type(delay)))
+        if delay < 0:
+            raise ValueError('delay argument has to be non-negative')
+        self._add_timer_action(timer_name, delay, False)
+
+    def set_timer_once(self, timer_name: str, delay: float):
+        """
+        Sets a timer that will trigger on_timer callback after the specified delay.
+        If there is an active timer with this name, this call is ignored.
+        """
+        if not isinstance(timer_name, str):
+            raise TypeError('timer_name argument has to be str, not {}'.format(type(timer_name)))
+        if len(timer_name) > 50:
+            raise ValueError('timer_name length exceeds the limit of 50 characters')
+        if not isinstance(delay, (int, float)):
+            raise TypeError('delay argument has to be int or float, not {}'.format(type(delay)))
+        if delay < 0:
+            raise ValueError('delay argument has to be non-negative')
+        self._add_timer_action(timer_name, delay, True)
+
+    def cancel_timer(self, timer_name: str):
+        """
+        Cancels timer with the specified name.
+        """
+        if not isinstance(timer_name, str):
+            raise TypeError('timer_name argument has to be str, not {}'.format(type(timer_name)))
+        self._add_timer_action(timer_name, -1, False)
+
+    def _add_timer_action(self, timer_name: str, delay: float, once: bool):
+        # keep a single resulting action per timer, so repeated set/cancel calls are coalesced
+        index = self._timer_index.get(timer_name)
+        if index is None:
+            self._timer_index[timer_name] = len(self._timer_actions)
+            self._timer_actions.append((timer_name, delay, once))
+            return
+        if once:
+            if self._timer_actions[index][1] >= 0:
+                # timer is already set in this callback
+                return
+            # timer is cancelled in this callback, so this is an ordinary set
+            once = False
+        self._timer_actions[index] = (timer_name, delay, once)
+
+    def time(self) -> float:
+        """
+        Returns the current system time.
+        """
+        return self._time
+
+    @property
+    def rng(self) -> RandomStream:
+        """
+        Returns the random stream of the process. Runtimes that do not provide
+        per-process streams fall back to the global random module.
+        """
+        return self._rng
+
+
+class Process:
+    @abc.abstractmethod
+    def on_local_message(self, msg: Message, ctx: Context):
+        """
+        This method is called when a _local_ message is received.
+        """
+
+    @abc.abstractmethod
+    def on_message(self, msg: Message, sender: str, ctx: Context):
+        """
+        This method is called when a message is received.
+        """
+
+    @abc.abstractmethod
+    def on_timer(self, timer_name: str, ctx: Context):
+        """
+        This method is called when a timer fires.
+        """
+
+    def on_messages(self, batch: List[Tuple[Message, str]], ctx: Context):
+        """
+        This method is called with (message, sender) pairs delivered at the same time,
+        if the runtime supports batched delivery. By default calls on_message for each of them.
+        """
+        for msg, sender in batch:
+            self.on_message(msg, sender, ctx)
+
+    def snapshot(self) -> Snapshot:
+        """
+        This method returns the raw snapshot of process state.
+        Attributes still holding the same immutable value as in the previous snapshot are not re-encoded,
+        mutable ones are re-encoded but share bytes with the previous snapshot if unchanged.
+        """
+        cache = self.__dict__.get('_Process__snapshot_cache')
+        if cache is None:
+            cache = self.__dict__['_Process__snapshot_cache'] = {}
+            self.__dict__['_Process__fingerprint'] = 0
+        fingerprint = self.__dict__['_Process__fingerprint']
+        attrs = {}
+        for name, member in self.__dict__.items():
+            if name.startswith('_Process__'):
+                continue
+            entry = cache.get(name)
+            if entry is None or entry[0] is not member or not entry[2]:
+                data = pickle.dumps(member)
+                if entry is not None and entry[1] == data:
+                    entry = cache[name] = (member, entry[1], _is_immutable(member), entry[3])
+                else:
+                    digest = _attr_digest(name, data)
+                    if entry is not None:
+                        fingerprint -= entry[3]
+                    fingerprint += digest
+                    entry = cache[name] = (member, data, _is_immutable(member), digest)
+            attrs[name] = entry[1]
+        if len(cache) > len(attrs):
+            for name in [name for name in cache if name not in attrs]:
+                fingerprint -= cache.pop(name)[3]
+        fingerprint &= _FINGERPRINT_MASK
+        self.__dict__['_Process__fingerprint'] = fingerprint
+        return Snapshot(attrs, fingerprint)
+
+    def restore(self, snapshot: Snapshot):
+        """
+        This method restores the process state from its raw snapshot.
+        Immutable attributes whose encoding did not change keep their current value.
+        """
+        old_cache = self.__dict__.get('_Process__snapshot_cache') or {}
+        cache = {}
+        fingerprint = 0
+        for name in self.__dict__:
+            if not name.startswith('_Process__'):
+                self.__dict__[name] = None
+        for name, data in snapshot.attrs.items():
+            entry = old_cache.get(name)
+            if entry is None or not entry[2] or entry[1] != data:
+                member = pickle.loads(data)
+                digest = entry[3] if entry is not None and entry[1] == data else _attr_digest(name, data)
+                entry = (member, data, _is_immutable(member), digest)
+            self.__dict__[name] = entry[0]
+            cache[name] = entry
+            fingerprint += entry[3]
+        self.__dict__['_Process__snapshot_cache'] = cache
+        self.__dict__['_Process__fingerprint'] = fingerprint & _FINGERPRINT_MASK
+
+    def fingerprint(self, bits: int = 128) -> int:
+        """
+        This method returns a stable hash of process state, equal for processes with equal snapshots.
+        The hash is a sum of per-attribute hashes, so only the changed attributes are rehashed.
+        """
+        return self.snapshot().fingerprint & ((1 << bits) - 1)
+
+    def get_state(self) -> str:
+        """
+        This method returns the string representation of process state.
+        Each byte of the raw snapshot is mapped to a single character.
+        """
+        return self.snapshot().to_bytes().decode('latin-1')
+
+    def set_state(self, state_encoded: str):
+        """
+        This method restores the process state by its string representation.
+        """
+        self.restore(Snapshot.from_bytes(state_encoded.encode('latin-1')))
+
+
+_FINGERPRINT_MASK = (1 << 128) - 1
+
+
+def _attr_digest(name: str, data: bytes) -> int:
+    h = hashlib.blake2b(name.encode(), digest_size=16)
+    h.update(b'\0')
+    h.update(data)
+    return int.from_bytes(h.digest(), 'little')
+
+
+_IMMUTABLE_TYPES = {type(None), bool, int, float, complex, str, bytes, range}
+# values for which equality of the same type implies equal encoding: floats are left out,
+# as 0.0 == -0.0 is encoded differently and nan != nan would never match
+_REUSABLE_TYPES = {type(None), bool, int, str, bytes}
+
+
+def _is_immutable(value: Any) -> bool:
+    if type(value) in _IMMUTABLE_TYPES:
+        return True
+    if type(value) in (tuple, frozenset):
+        return all(_is_immutable(item) for item in value)
+    return False
+
+
+class Snapshot:
+    """
+    Process state as pickled bytes per attribute.
+    Successive snapshots of the same process share the bytes of unchanged attributes.
+    """
+    __slots__ = ('attrs', '_fingerprint')
+
+    _header = struct.Struct('<HI')
+
+    def __init__(self, attrs: Dict[str, bytes], fingerprint: Optional[int] = None):
+        self.attrs = attrs
+        self._fingerprint = fingerprint
+
+    @property
+    def fingerprint(self) -> int:
+        """
+        128-bit hash of the snapshot, see Process.fingerprint().
+        """
+        if self._fingerprint is None:
+            fingerprint = sum(_attr_digest(name, data) for name, data in self.attrs.items())
+            self._fingerprint = fingerprint & _FINGERPRINT_MASK
+        return self._fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Snapshot) and self.attrs == other.attrs
+
+    def __hash__(self) -> int:
+        return self.fingerprint
+
+    def size(self) -> int:
+        """
+        Returns the size of encoded snapshot in bytes.
+        """
+        return sum(self._header.size + len(name.encode()) + len(data) for name, data in self.attrs.items())
+
+    def to_bytes(self) -> bytes:
+        parts = []
+        for name, data in self.attrs.items():
+            key = name.encode()
+            parts.append(self._header.pack(len(key), len(data)))
+            parts.append(key)
+            parts.append(data)
+        return b''.join(parts)
+
+    @staticmethod
+    def from_bytes(blob: bytes) -> Snapshot:
+        attrs = {}
+        view = memoryview(blob)
+        header = Snapshot._header
+        pos = 0
+        while pos < len(blob):
+            key_len, data_len = header.unpack_from(blob, pos)
+            pos += header.size
+            name = str(view[pos:pos + key_len], 'utf-8')
+            pos += key_len
+            attrs[name] = bytes(view[pos:pos + data_len])
+            pos += data_len
+        return Snapshot(attrs)
+
+
+class VisitedStates:
+    """
+    Bounded-memory set of visited state fingerprints for state-space exploration (bitstate hashing).
+    Adding and lookup are O(1), but a new state may be mistaken for a visited one with probability
+    reported by false_positive_rate(), which grows as the set fills up.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 24, hashes: int = 3):
+        if max_bytes <= 0:
+            raise ValueError('max_bytes argument has to be positive')
+        if hashes <= 0:
+            raise ValueError('hashes argument has to be positive')
+        self._bits = bytearray(max_bytes)
+        self._size = max_bytes * 8
+        self._hashes = hashes
+        self._count = 0
+
+    def _positions(self, fingerprint: int) -> List[int]:
+        h1 = fingerprint & 0xFFFFFFFFFFFFFFFF
+        h2 = (fingerprint >> 64) | 1
+        return [(h1 + i * h2) % self._size for i in range(self._hashes)]
+
+    def add(self, fingerprint: int) -> bool:
+        """
+        Marks the state as visited. Returns False if it was (probably) visited before.
+        """
+        bits = self._bits
+        new = False
+        for pos in self._positions(fingerprint):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, fingerprint: int) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fingerprint))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def false_positive_rate(self) -> float:
+        """
+        Returns the probability that a new state is reported as visited.
+        """
+        return (1 - math.exp(-self._hashes * self._count / self._size)) ** self._hashes
+
+
+class _CallStats:
+    """
+    Statistics of callback calls with the same key. Histogram bucket i counts calls
+    which took [2^i, 2^(i+1)) microseconds, bucket 0 also counts faster ones.
+    """
+    __slots__ = ('calls', 'wall_ns', 'cpu_ns', 'wall_hist', 'cpu_hist', 'sent_messages', 'sent_bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_ns = 0
+        self.cpu_ns = 0
+        self.wall_hist: List[int] = []
+        self.cpu_hist: List[int] = []
+        self.sent_messages = 0
+        self.sent_bytes = 0
+
+    @staticmethod
+    def _add(hist: List[int], ns: int):
+        bucket = max(0, (ns // 1000).bit_length() - 1)
+        if bucket >= len(hist):
+            hist.extend([0] * (bucket + 1 - len(hist)))
+        hist[bucket] += 1
+
+    def add(self, wall_ns: int, cpu_ns: int):
+        self.calls += 1
+        self.wall_ns += wall_ns
+        self.cpu_ns += cpu_ns
+        self._add(self.wall_hist, wall_ns)
+        self._add(self.cpu_hist, cpu_ns)
+
+    @staticmethod
+    def percentile(hist: List[int], q: float) -> float:
+        """
+        Returns the upper bound of the bucket containing the q-th quantile, in microseconds.
+        """
+        rank = q * sum(hist)
+        seen = 0
+        for bucket, count in enumerate(hist):
+            seen += count
+            if count and seen >= rank:
+                return float(2 ** (bucket + 1))
+        return 0.
+
+
+class Profiler:
+    """
+    Collects call counts, wall and CPU time histograms of process callbacks
+    per process class, callback and message type (timer name for on_timer),
+    and the number and size of messages sent by them.
+
+    Processes are instrumented by attach() which switches them to a subclass
+    with timed callbacks, so it works with any runtime and costs nothing for other processes.
+    """
+
+    CALLBACKS = ('on_local_message', 'on_message', 'on_timer', 'on_messages')
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str, str], _CallStats] = {}
+        self._classes: Dict[type, type] = {}
+
+    def attach(self, proc: Process):
+        cls = type(proc)
+        if cls in self._classes.values():
+            return
+        profiled = self._classes.get(cls)
+        if profiled is None:
+            profiled = self._classes[cls] = self._instrument(cls)
+        proc.__class__ = profiled
+
+    def detach(self, proc: Process):
+        cls = type(proc)
+        if cls in self._classes.values():
+            proc.__class__ = cls.__bases__[0]
+
+    def _instrument(self, cls: type) -> type:
+        members = {'__module__': cls.__module__}
+        for callback in self.CALLBACKS:
+            # the default on_messages calls on_message, which is profiled by itself
+            if callback == 'on_messages' and cls.on_messages is Process.on_messages:
+                continue
+            members[callback] = self._wrap(cls.__name__, callback, getattr(cls, callback))
+        return type(cls.__name__, (cls,), members)
+
+    def _wrap(self, class_name: str, callback: str, func):
+        stats = self._stats
+        if callback == 'on_timer':
+            def key_of(args):
+                return args[0]
+        elif callback == 'on_messages':
+            def key_of(args):
+                types = {msg.type for msg, _ in args[0]}
+                return types.pop() if len(types) == 1 else '*'
+        else:
+            def key_of(args):
+                return args[0].type
+
+        def wrapper(proc, *args):
+            ctx = args[-1]
+            sent_before = len(ctx._sent_messages)
+            cpu_start = time.thread_time_ns()
+            wall_start = time.perf_counter_ns()
+            try:
+                return func(proc, *args)
+            finally:
+                wall_ns = time.perf_counter_ns() - wall_start
+                cpu_ns = time.thread_time_ns() - cpu_start
+                key = (class_name, callback, key_of(args))
+                entry = stats.get(key)
+                if entry is None:
+                    entry = stats[key] = _CallStats()
+                entry.add(wall_ns, cpu_ns)
+                sent = ctx._sent_messages[sent_before:]
+                entry.sent_messages += len(sent)
+                for _, payload, _ in sent:
+                    if isinstance(payload, (str, bytes)):
+                        entry.sent_bytes += len(payload)
+
+        wrapper.__name__ = callback
+        wrapper.__qualname__ = '{}.{}'.format(class_name, callback)
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def reset(self):
+        self._stats.clear()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        Returns statistics as a list of JSON-serializable dicts sorted by total wall time.
+        Times are in microseconds, histograms are described in _CallStats.
+        """
+        rows = []
+        for (class_name, callback, key), entry in self._stats.items():
+            rows.append({
+                'class': class_name,
+                'callback': callback,
+                'type': key,
+                'calls': entry.calls,
+                'wall_us': entry.wall_ns / 1000,
+                'cpu_us': entry.cpu_ns / 1000,
+                'wall_p50_us': _CallStats.percentile(entry.wall_hist, 0.5),
+                'wall_p99_us': _CallStats.percentile(entry.wall_hist, 0.99),
+                'wall_hist': list(entry.wall_hist),
+                'cpu_hist': list(entry.cpu_hist),
+                'sent_messages': entry.sent_messages,
+                'sent_bytes': entry.sent_bytes,
+            })
+        rows.sort(key=lambda row: row['wall_us'], reverse=True)
+        return rows
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def format_report(self) -> str:
+        lines = ['{:<12} {:<17} {:<14} {:>9} {:>11} {:>11} {:>9} {:>9} {:>9} {:>11}'.format(
+            'class', 'callback', 'type', 'calls', 'wall ms', 'cpu ms', 'mean us', 'p50 us', 'p99 us', 'sent bytes')]
+        for row in self.report():
+            lines.append('{:<12} {:<17} {:<14} {:>9} {:>11.1f} {:>11.1f} {:>9.1f} {:>9.0f} {:>9.0f} {:>11}'.format(
+                row['class'][:12], row['callback'], row['type'][:14], row['calls'], row['wall_us'] / 1000,
+                row['cpu_us'] / 1000, row['wall_us'] / row['calls'], row['wall_p50_us'], row['wall_p99_us'],
+                row['sent_bytes']))
+        return '\n'.join(lines)
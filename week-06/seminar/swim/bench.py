@@ -0,0 +1,116 @@
+import argparse
+import functools
+import statistics
+import time
+
+from anysim import System
+from anysystem import Message, get_codec
+
+import swim
+
+
+def build_system(peer_class, nodes: int, drop_rate: float, seed: int, codec: str) -> System:
+    sys = System(seed, get_codec(codec))
+    sys.network().set_delays(0.01, 0.1)
+    sys.network().set_drop_rate(drop_rate)
+    for proc_id in range(nodes):
+        # process and node on which it runs have the same name
+        name = str(proc_id)
+        sys.add_node(name)
+        sys.add_process(name, peer_class(proc_id, nodes), name)
+        sys.send_local_message(name, Message('START', {}))
+    return sys
+
+
+def bench_detection(args):
+    print(f'Node 0 crashes at {args.warmup}s, drop rate: {args.drop_rate}, runs: {args.runs}')
+    print(f'{"nodes":>6} {"suspected":>10} {"dead":>8} {"all know":>9} {"detected":>9} '
+          f'{"false dead":>11} {"msgs/node/s":>12} {"run time":>9}')
+    peer_class = functools.partial(swim.Peer, lifeguard=not args.no_lifeguard)
+    for nodes in args.nodes:
+        suspected, dead, all_know = [], [], []
+        false_dead = 0
+        load = []
+        start = time.perf_counter()
+        for run in range(args.runs):
+            sys = build_system(peer_class, nodes, args.drop_rate, args.seed + run, args.codec)
+            sys.step_for_duration(args.warmup)
+            for proc in sys.process_names():
+                sys.read_local_messages(proc)
+            sent = sys.network().network_message_count()
+            # the crashed node is isolated, its process keeps running but nobody hears from it
+            sys.network().drop_incoming('0')
+            sys.network().drop_outgoing('0')
+            crashed_at = sys.time()
+            first_suspect = first_dead = None
+            knowing = set()
+            while sys.time() - crashed_at < args.time_limit and len(knowing) < nodes - 1:
+                sys.step_for_duration(0.05)
+                for proc in sys.process_names()[1:]:
+                    for msg in sys.read_local_messages(proc):
+                        if msg['node'] != '0':
+                            false_dead += msg.type == 'DEAD'
+                        elif msg.type == 'SUSPECT' and first_suspect is None:
+                            first_suspect = sys.time() - crashed_at
+                        elif msg.type == 'DEAD':
+                            if first_dead is None:
+                                first_dead = sys.time() - crashed_at
+                            knowing.add(proc)
+            load.append((sys.network().network_message_count() - sent) / nodes / (sys.time() - crashed_at))
+            if first_suspect is not None:
+                suspected.append(first_suspect)
+            if first_dead is not None:
+                dead.append(first_dead)
+            if len(knowing) == nodes - 1:
+                all_know.append(sys.time() - crashed_at)
+        run_time = time.perf_counter() - start
+        mean = lambda values: f'{statistics.fmean(values):.2f}' if values else '-'
+        print(f'{nodes:>6} {mean(suspected):>10} {mean(dead):>8} {mean(all_know):>9} '
+              f'{len(all_know):>5}/{args.runs:<3} {false_dead:>11} {statistics.fmean(load):>12.2f} '
+              f'{run_time:>8.2f}s')
+
+
+def bench_false_positives(args):
+    print(f'Nodes: {args.nodes}, no failures, {args.duration}s per run')
+    print(f'{"drop rate":>9} {"lifeguard":>10} {"suspicions":>11} {"refuted":>8} {"false dead":>11} '
+          f'{"per node-hour":>14} {"msgs/node/s":>12}')
+    for drop_rate in args.drop_rates:
+        for lifeguard in [False, True]:
+            peer_class = functools.partial(swim.Peer, lifeguard=lifeguard)
+            sys = build_system(peer_class, args.nodes, drop_rate, args.seed, args.codec)
+            sys.step_for_duration(args.duration)
+            counts = {'SUSPECT': 0, 'DEAD': 0, 'ALIVE': 0}
+            for proc in sys.process_names():
+                for msg in sys.local_outbox(proc):
+                    counts[msg.type] += 1
+            per_hour = counts['DEAD'] / (args.nodes * args.duration / 3600)
+            load = sys.network().network_message_count() / args.nodes / args.duration
+            print(f'{drop_rate:>9} {str(lifeguard):>10} {counts["SUSPECT"]:>11} {counts["ALIVE"]:>8} '
+                  f'{counts["DEAD"]:>11} {per_hour:>14.2f} {load:>12.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the SWIM failure detector.')
+    subparsers = parser.add_subparsers(dest='bench', required=True)
+
+    detection_parser = subparsers.add_parser('detection', help='time to detect a crashed node')
+    detection_parser.add_argument('-n', '--nodes', type=int, nargs='+', default=[16, 64, 256])
+    detection_parser.add_argument('-d', '--drop-rate', type=float, default=0.01)
+    detection_parser.add_argument('-w', '--warmup', type=float, default=10)
+    detection_parser.add_argument('-l', '--time-limit', type=float, default=300)
+    detection_parser.add_argument('-r', '--runs', type=int, default=5)
+    detection_parser.add_argument('-c', '--codec', default='ref')
+    detection_parser.add_argument('-s', '--seed', type=int, default=123)
+    detection_parser.add_argument('--no-lifeguard', action='store_true')
+    detection_parser.set_defaults(func=bench_detection)
+
+    false_positives_parser = subparsers.add_parser('false-positives', help='false failure detections on a lossy network')
+    false_positives_parser.add_argument('-n', '--nodes', type=int, default=64)
+    false_positives_parser.add_argument('-d', '--drop-rates', type=float, nargs='+', default=[0.05, 0.1, 0.2])
+    false_positives_parser.add_argument('-t', '--duration', type=float, default=300)
+    false_positives_parser.add_argument('-c', '--codec', default='ref')
+    false_positives_parser.add_argument('-s', '--seed', type=int, default=123)
+    false_positives_parser.set_defaults(func=bench_false_positives)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,225 @@
+import math
+
+from anysystem import Context, Message, Process
+
+ALIVE = 'alive'
+SUSPECT = 'suspect'
+DEAD = 'dead'
+
+
+class Peer(Process):
+    """
+    SWIM failure detector and membership dissemination with the Lifeguard extensions.
+
+    Each period a peer pings the next member of a randomly shuffled list. If no ACK comes within
+    ping_timeout, it asks indirect_probes random members to ping the target on its behalf (PING_REQ).
+    A member not acknowledged by the end of the period becomes suspected and is declared dead
+    when the suspicion timeout expires, unless it refutes the suspicion with a greater incarnation.
+    Membership updates are piggybacked on PING, PING_REQ and ACK messages (infection-style),
+    each one is transmitted retransmit_mult * ceil(log10(N + 1)) times, so the load of a peer
+    does not depend on the cluster size.
+
+    Lifeguard: the suspicion timeout starts at suspicion_max_mult * Min and drops logarithmically
+    to Min = suspicion_mult * log10(N) * period as independent confirmations arrive, the probe period
+    and ping timeout grow with the local health multiplier (failed probes and refuted suspicions
+    about itself), and a ping to a suspected member carries its suspicion so it can refute it at once.
+    Changes of the member states are reported with SUSPECT, DEAD and ALIVE local messages.
+    """
+
+    def __init__(self, proc_id: int, proc_count: int, period: float = 1., ping_timeout: float = 0.4,
+                 indirect_probes: int = 3, max_piggyback: int = 8, retransmit_mult: int = 4,
+                 suspicion_mult: float = 5, suspicion_max_mult: float = 6, confirmations: int = 3,
+                 max_health: int = 8, lifeguard: bool = True):
+        if confirmations < 1:
+            raise ValueError('confirmations has to be positive')
+        self._id = str(proc_id)
+        self._period = period
+        self._ping_timeout = ping_timeout
+        self._indirect_probes = indirect_probes
+        self._max_piggyback = max_piggyback
+        self._transmit_limit = retransmit_mult * math.ceil(math.log10(proc_count + 1))
+        self._min_suspicion = suspicion_mult * max(1., math.log10(proc_count)) * period
+        self._max_suspicion = suspicion_max_mult * self._min_suspicion if lifeguard else self._min_suspicion
+        self._confirmations = confirmations
+        self._max_health = max_health if lifeguard else 0
+        self._lifeguard = lifeguard
+        self._incarnation = 0
+        # member -> [state, incarnation]
+        self._members = {str(i): [ALIVE, 0] for i in range(proc_count) if i != proc_id}
+        # suspected member -> [time of suspicion, members which suspect it]
+        self._suspicions = {}
+        # member -> [state, incarnation, origin, number of transmissions]
+        self._updates = {}
+        self._probe_order = []
+        self._probe_index = 0
+        self._probe_target = None
+        self._probe_seq = 0
+        self._acked = True
+        self._seq = 0
+        # seq of a ping sent on behalf of another member -> [requester, its seq, time]
+        self._forwards = {}
+        # local health multiplier, the probe period and ping timeout are scaled by health + 1
+        self._health = 0
+
+    def on_local_message(self, msg: Message, ctx: Context):
+        if msg.type == 'START':
+            # random phase, so that peers do not probe in lockstep
+            ctx.set_timer('probe', ctx.rng.uniform(0, self._period))
+
+    def on_message(self, msg: Message, sender: str, ctx: Context):
+        for update in msg['updates']:
+            self.apply(*update, ctx)
+        if msg.type == 'PING':
+            ctx.send(Message('ACK', {'seq': msg['seq'], 'updates': self.piggyback()}), sender)
+        elif msg.type == 'PING_REQ':
+            self._seq += 1
+            self._forwards[self._seq] = [sender, msg['seq'], ctx.time()]
+            self.ping(msg['target'], self._seq, ctx)
+        elif msg.type == 'ACK':
+            seq = msg['seq']
+            if seq == self._probe_seq:
+                self._acked = True
+            else:
+                forward = self._forwards.pop(seq, None)
+                if forward is not None:
+                    ctx.send(Message('ACK', {'seq': forward[1], 'updates': self.piggyback()}), forward[0])
+
+    def on_timer(self, timer_name: str, ctx: Context):
+        if timer_name == 'probe':
+            self.finish_probe(ctx)
+            self.probe(ctx)
+        elif timer_name == 'ping_timeout':
+            if not self._acked:
+                self.ping_req(ctx)
+        else:
+            # suspicion timeout, the timer is named after the suspected member
+            node = timer_name[len('suspect:'):]
+            member = self._members[node]
+            if member[0] == SUSPECT:
+                self.apply(node, DEAD, member[1], self._id, ctx)
+
+    def probe(self, ctx):
+        target = self.next_target(ctx)
+        scale = self._health + 1
+        self._probe_target = target
+        if target is not None:
+            self._seq += 1
+            self._probe_seq = self._seq
+            self._acked = False
+            self.ping(target, self._seq, ctx)
+            ctx.set_timer('ping_timeout', self._ping_timeout * scale)
+        ctx.set_timer('probe', self._period * scale)
+
+    def finish_probe(self, ctx):
+        if self._probe_target is not None:
+            if self._acked:
+                self._health = max(self._health - 1, 0)
+            else:
+                self._health = min(self._health + 1, self._max_health)
+                member = self._members[self._probe_target]
+                # the target may have been declared dead by others meanwhile
+                if member[0] != DEAD:
+                    self.apply(self._probe_target, SUSPECT, member[1], self._id, ctx)
+        now = ctx.time()
+        for seq in [seq for seq, forward in self._forwards.items() if now - forward[2] > self._period]:
+            del self._forwards[seq]
+
+    def next_target(self, ctx):
+        for _ in range(2):
+            while self._probe_index < len(self._probe_order):
+                node = self._probe_order[self._probe_index]
+                self._probe_index += 1
+                if self._members[node][0] != DEAD:
+                    return node
+            # next round over all members in a new random order, each one is probed once per round
+            order = [node for node, (state, _) in self._members.items() if state != DEAD]
+            for i in range(len(order) - 1, 0, -1):
+                j = ctx.rng.randrange(i + 1)
+                order[i], order[j] = order[j], order[i]
+            self._probe_order = order
+            self._probe_index = 0
+        return None
+
+    def ping(self, target, seq, ctx):
+        updates = self.piggyback()
+        member = self._members[target]
+        # buddy system: a suspected member learns about the suspicion from the ping itself
+        if self._lifeguard and member[0] == SUSPECT and all(update[0] != target for update in updates):
+            updates.append([target, SUSPECT, member[1], self._id])
+        ctx.send(Message('PING', {'seq': seq, 'updates': updates}), target)
+
+    def ping_req(self, ctx):
+        target = self._probe_target
+        helpers = [node for node, (state, _) in self._members.items() if state == ALIVE and node != target]
+        indexes = ctx.rng.sample(len(helpers), min(self._indirect_probes, len(helpers)))
+        if indexes:
+            msg = Message('PING_REQ', {'seq': self._probe_seq, 'target': target,
+                                       'updates': self.piggyback(len(indexes))})
+            ctx.multicast(msg, [helpers[i] for i in indexes])
+
+    def apply(self, node, state, incarnation, origin, ctx):
+        if node == self._id:
+            if state != ALIVE and incarnation >= self._incarnation:
+                # refute the suspicion by gossiping a greater incarnation
+                self._incarnation = incarnation + 1
+                self._health = min(self._health + 1, self._max_health)
+                self.enqueue(self._id, ALIVE, self._incarnation, self._id)
+            return
+        member = self._members[node]
+        current_state, current_incarnation = member
+        if state == ALIVE:
+            if incarnation <= current_incarnation:
+                return
+        elif state == SUSPECT:
+            if current_state == DEAD or incarnation < current_incarnation:
+                return
+            if current_state == SUSPECT and incarnation == current_incarnation:
+                self.confirm(node, origin, ctx)
+                return
+        elif current_state == DEAD or incarnation < current_incarnation:
+            return
+        member[0] = state
+        member[1] = incarnation
+        self.enqueue(node, state, incarnation, origin)
+        if state == SUSPECT:
+            self._suspicions[node] = [ctx.time(), {origin}]
+            ctx.set_timer('suspect:' + node, self.suspicion_timeout(0))
+        elif current_state == SUSPECT:
+            del self._suspicions[node]
+            ctx.cancel_timer('suspect:' + node)
+        if state != ALIVE or current_state != ALIVE:
+            ctx.send_local(Message(state.upper(), {'node': node}))
+
+    def confirm(self, node, origin, ctx):
+        suspicion = self._suspicions[node]
+        if not self._lifeguard or origin in suspicion[1]:
+            return
+        suspicion[1].add(origin)
+        # confirmations are gossiped further, so that other members shorten their timeouts too
+        self.enqueue(node, SUSPECT, self._members[node][1], origin)
+        remaining = suspicion[0] + self.suspicion_timeout(len(suspicion[1]) - 1) - ctx.time()
+        if remaining > 0:
+            ctx.set_timer('suspect:' + node, remaining)
+        else:
+            self.apply(node, DEAD, self._members[node][1], self._id, ctx)
+
+    def suspicion_timeout(self, confirmations):
+        confirmations = min(confirmations, self._confirmations)
+        drop = math.log(confirmations + 1) / math.log(self._confirmations + 1)
+        return max(self._min_suspicion, self._max_suspicion - (self._max_suspicion - self._min_suspicion) * drop)
+
+    def enqueue(self, node, state, incarnation, origin):
+        # a newer update about the member replaces the queued one
+        self._updates[node] = [state, incarnation, origin, 0]
+
+    def piggyback(self, count=1):
+        # the least transmitted updates go first, an update is sent to count members
+        nodes = sorted(self._updates, key=lambda node: self._updates[node][3])[:self._max_piggyback]
+        updates = []
+        for node in nodes:
+            update = self._updates[node]
+            updates.append([node, update[0], update[1], update[2]])
+            update[3] += count
+            if update[3] >= self._transmit_limit:
+                del self._updates[node]
+        return updates